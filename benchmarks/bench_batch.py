@@ -0,0 +1,89 @@
+"""对比第三回逐张重建 2x5 子图与 fantastic.batch 模板复用的吞吐量。
+
+用法::
+
+    python benchmarks/bench_batch.py [--batches 200] [--points 10] [--jobs 4]
+
+两种写法都把每批数据（10 个子图，每个子图 ``--points`` 个散点）写成一个 PNG，
+另外给出模板写法拼成雪碧图时的吞吐量。
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fantastic.batch import render_batches  # noqa: E402
+
+SPEC = dict(nrows=2, ncols=5, figsize=(10, 4), sharex=True, sharey=True,
+            xlim=(-5, 5), ylim=(-5, 5), xlabel='x', ylabel='y',
+            titles=['row %d, col %d' % (i + 1, j + 1)
+                    for i in range(2) for j in range(5)])
+
+
+def make_batches(n_batches, n_points, seed=0):
+    rng = np.random.default_rng(seed)
+    return [[{'offsets': rng.standard_normal((n_points, 2))}
+             for _ in range(10)] for _ in range(n_batches)]
+
+
+def rebuild(batches, outdir):
+    # 第三回样例1的写法：每批数据重新创建整张图
+    for k, panels in enumerate(batches):
+        fig, axs = plt.subplots(2, 5, figsize=(10, 4), sharex=True,
+                                sharey=True)
+        for i in range(2):
+            for j in range(5):
+                xy = panels[i * 5 + j]['offsets']
+                axs[i][j].scatter(xy[:, 0], xy[:, 1])
+                axs[i][j].set_title('row %d, col %d' % (i + 1, j + 1))
+                axs[i][j].set_xlim(-5, 5)
+                axs[i][j].set_ylim(-5, 5)
+                if i == 1:
+                    axs[i][j].set_xlabel('x')
+                if j == 0:
+                    axs[i][j].set_ylabel('y')
+        fig.tight_layout()
+        fig.savefig(os.path.join(outdir, f'rebuild_{k:06d}.png'))
+        plt.close(fig)
+
+
+def timed(label, n, func, *args, **kwargs):
+    t0 = time.perf_counter()
+    func(*args, **kwargs)
+    dt = time.perf_counter() - t0
+    print(f'{label:<28} {dt:>8.2f}s {n / dt:>10.1f} 批/秒')
+    return dt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batches', type=int, default=200)
+    parser.add_argument('--points', type=int, default=10)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    batches = make_batches(args.batches, args.points)
+    n = len(batches)
+    with tempfile.TemporaryDirectory() as tmp:
+        t_rebuild = timed('逐张重建', n, rebuild, batches, tmp)
+        t_template = timed('模板复用（单进程）', n, render_batches, SPEC,
+                           batches, tmp, jobs=1)
+        timed(f'模板复用（{args.jobs} 进程）', n, render_batches, SPEC,
+              batches, tmp, jobs=args.jobs)
+        timed(f'雪碧图 16 帧/张（{args.jobs} 进程）', n, render_batches, SPEC,
+              batches, tmp, per_sheet=16, jobs=args.jobs)
+    print(f'单进程加速比: {t_rebuild / t_template:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""对比 ``pd.read_csv`` 与 fantastic.data 列式缓存读取 ``data/*.csv`` 的耗时。
+
+用法::
+
+    python benchmarks/bench_data.py [--repeat 20] [--cache-dir DIR]
+
+缓存读取计时包含校验源文件、打开元数据并映射前两列，即画一张散点图实际需要的读取量。
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fantastic import data  # noqa: E402
+
+
+def median_time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--cache-dir', default=None,
+                        help='缓存目录，默认使用临时目录')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = args.cache_dir or tmp
+        print(f'{"数据集":<12} {"行数":>8} {"read_csv":>10} {"首次转换":>10} '
+              f'{"缓存读取":>10} {"加速比":>8}')
+        for name in data.available():
+            path = data.resolve(name)
+            t_csv = median_time(
+                lambda: pd.read_csv(path, encoding='utf-8-sig'), args.repeat)
+            t0 = time.perf_counter()
+            table = data.load(name, cache_dir=cache_dir)
+            t_convert = time.perf_counter() - t0
+
+            def cached():
+                t = data.load(name, cache_dir=cache_dir)
+                for column in t.columns[:2]:
+                    np.asarray(t.codes(column))
+
+            t_cached = median_time(cached, args.repeat)
+            print(f'{name:<12} {len(table):>8} {t_csv * 1e3:>8.2f}ms '
+                  f'{t_convert * 1e3:>8.2f}ms {t_cached * 1e3:>8.2f}ms '
+                  f'{t_csv / t_cached:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+"""教程绘图套路的耗时与内存基准测试，结果追加到 JSON 历史记录中。
+
+每个 (套路, 规模, 后端) 组合在单独的子进程中运行，记录：
+
+- ``build_s``：创建图形（含 ``tight_layout``）的耗时；
+- ``draw_s``：``canvas.draw()`` 的耗时（仅 Agg）；
+- ``savefig_s``：保存为 png/svg/pdf 的耗时，``bytes`` 为输出大小；
+- ``rss_peak_kb``：子进程的峰值 RSS，``rss_delta_kb`` 为减去导入库之后的基线；
+  ``rss_build_kb``、``rss_draw_kb``、``rss_savefig_kb`` 为第一次运行时各阶段使峰值 RSS
+  增加的量；
+- ``alloc_peak_bytes``：tracemalloc 统计的一次完整"创建+绘制+保存"的 Python 内存分配峰值；
+  ``alloc_build_bytes``、``alloc_draw_bytes``、``alloc_savefig_bytes`` 为各阶段相对于
+  阶段开始时的分配峰值；
+- ``alloc_blocks``：保存后图形仍持有的内存块数量。
+
+用法::
+
+    python benchmarks/bench_recipes.py run                     # 运行全部套路
+    python benchmarks/bench_recipes.py run -r subplots_grid -b agg svg --sizes 10 1000
+    python benchmarks/bench_recipes.py compare                 # 最近两次运行对比
+    python benchmarks/bench_recipes.py compare --against 0 --time-tol 0.3
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+DEFAULT_HISTORY = os.path.join(HERE, 'history.json')
+BACKENDS = ('agg', 'svg', 'pdf')
+_FORMATS = {'agg': 'png', 'svg': 'svg', 'pdf': 'pdf'}
+
+TIME_METRICS = ('build_s', 'draw_s', 'savefig_s')
+MEMORY_METRICS = ('rss_delta_kb', 'alloc_peak_bytes', 'alloc_draw_bytes',
+                  'alloc_savefig_bytes')
+
+
+def _max_rss_kb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 上单位是字节，Linux 上是 KB
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def measure(case):
+    """在子进程中运行一个组合，返回结果字典。"""
+    recipe, n, backend, repeat = case
+    import gc
+    import tracemalloc
+    import warnings
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    sys.path.insert(0, HERE)
+    from recipes import RECIPES
+
+    warnings.simplefilter('ignore')
+    func = RECIPES[recipe]
+    fmt = _FORMATS[backend]
+    rss0 = _max_rss_kb()
+
+    def once(probe=None):
+        # probe 在每个阶段结束时以阶段名调用，用于按阶段记录内存
+        probe = probe or (lambda phase: None)
+        t0 = time.perf_counter()
+        fig = func(n)
+        t1 = time.perf_counter()
+        probe('build')
+        draw = None
+        if backend == 'agg':
+            # 计时从 probe 之后开始，不把记录内存的开销算进绘制耗时
+            t = time.perf_counter()
+            fig.canvas.draw()
+            draw = time.perf_counter() - t
+            probe('draw')
+        buf = io.BytesIO()
+        t2 = time.perf_counter()
+        fig.savefig(buf, format=fmt)
+        t3 = time.perf_counter()
+        probe('savefig')
+        return fig, t1 - t0, draw, t3 - t2, buf.tell()
+
+    rss_phases = {}
+    rss_last = [rss0]
+
+    def rss_probe(phase):
+        rss = _max_rss_kb()
+        if rss is not None:
+            rss_phases[phase] = rss - rss_last[0]
+            rss_last[0] = rss
+
+    timings = []
+    for i in range(repeat):
+        fig, build, draw, save, size = once(rss_probe if i == 0 else None)
+        plt.close(fig)
+        timings.append((build, draw, save))
+    gc.collect()
+
+    alloc_phases = {}
+    alloc_start = [0]
+    alloc_peak = [0]
+
+    def alloc_probe(phase):
+        current, peak = tracemalloc.get_traced_memory()
+        alloc_phases[phase] = peak - alloc_start[0]
+        alloc_peak[0] = max(alloc_peak[0], peak)
+        alloc_start[0] = current
+        tracemalloc.reset_peak()
+
+    tracemalloc.start()
+    fig, *_ = once(alloc_probe)
+    blocks = sum(s.count for s in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+    plt.close(fig)
+
+    rss1 = _max_rss_kb()
+    best = [min(t[i] for t in timings) if timings[0][i] is not None else None
+            for i in range(3)]
+    return {
+        'recipe': recipe, 'size': n, 'backend': backend,
+        'build_s': best[0], 'draw_s': best[1], 'savefig_s': best[2],
+        'bytes': size,
+        'rss_peak_kb': rss1,
+        'rss_delta_kb': None if rss1 is None else rss1 - rss0,
+        'rss_build_kb': rss_phases.get('build'),
+        'rss_draw_kb': rss_phases.get('draw'),
+        'rss_savefig_kb': rss_phases.get('savefig'),
+        'alloc_peak_bytes': alloc_peak[0],
+        'alloc_build_bytes': alloc_phases['build'],
+        'alloc_draw_bytes': alloc_phases.get('draw'),
+        'alloc_savefig_bytes': alloc_phases['savefig'],
+        'alloc_blocks': blocks,
+    }
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def run(args):
+    sys.path.insert(0, HERE)
+    from recipes import RECIPES, SIZES
+
+    recipes = args.recipe or list(RECIPES)
+    cases = [(r, n, b, args.repeat)
+             for r in recipes
+             for n in (args.sizes or SIZES[r])
+             for b in args.backend]
+
+    import matplotlib
+    import numpy
+    record = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'matplotlib': matplotlib.__version__,
+        'numpy': numpy.__version__,
+        'machine': platform.platform(),
+        'results': [],
+    }
+    # 每个组合用一个新进程，峰值 RSS 才能互不干扰
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1, maxtasksperchild=1) as pool:
+        for result in pool.imap(measure, cases):
+            record['results'].append(result)
+            print(_format_row(result), flush=True)
+
+    history = load_history(args.history)
+    history.append(record)
+    with open(args.history, 'w', encoding='utf-8') as f:
+        json.dump(history, f, ensure_ascii=False, indent=1)
+    print(f'已追加到 {args.history}（共 {len(history)} 次运行）')
+    return 0
+
+
+def _fmt(value, scale=1.0, digits=4):
+    return '-' if value is None else f'{value * scale:.{digits}f}'
+
+
+def _format_row(r):
+    return (f"{r['recipe']:<32} {r['size']:>7} {r['backend']:<4}"
+            f" build={_fmt(r['build_s'])}s draw={_fmt(r['draw_s'])}s"
+            f" savefig={_fmt(r['savefig_s'])}s bytes={r['bytes']}"
+            f" rss+={_fmt(r['rss_delta_kb'], 1 / 1024, 1)}MB"
+            f" alloc={_fmt(r['alloc_peak_bytes'], 1 / 2**20, 1)}MB"
+            f" (draw={_fmt(r.get('alloc_draw_bytes'), 1 / 2**20, 1)}MB"
+            f" savefig={_fmt(r.get('alloc_savefig_bytes'), 1 / 2**20, 1)}MB)")
+
+
+def compare_runs(base, head, time_tol=0.25, mem_tol=0.10, min_time=0.005,
+                 min_mem_kb=1024):
+    """对比两次运行，返回 ``[(键, 指标, 旧值, 新值, 比值), ...]`` 中的回退项。
+
+    耗时增长超过 ``time_tol`` 且绝对值超过 ``min_time`` 秒、内存增长超过
+    ``mem_tol`` 且绝对值超过 ``min_mem_kb`` KB 时视为回退。
+    """
+    index = {(r['recipe'], r['size'], r['backend']): r
+             for r in base['results']}
+    regressions = []
+    for r in head['results']:
+        key = (r['recipe'], r['size'], r['backend'])
+        old = index.get(key)
+        if old is None:
+            continue
+        for metric in TIME_METRICS + MEMORY_METRICS:
+            a, b = old.get(metric), r.get(metric)
+            if a is None or b is None or a <= 0:
+                continue
+            if metric in TIME_METRICS:
+                bad = b > a * (1 + time_tol) and b - a > min_time
+            else:
+                scale = 1024 if metric.startswith('alloc_') else 1
+                bad = b > a * (1 + mem_tol) and b - a > min_mem_kb * scale
+            if bad:
+                regressions.append((key, metric, a, b, b / a))
+    regressions.sort(key=lambda item: -item[4])
+    return regressions
+
+
+def compare(args):
+    history = load_history(args.history)
+    if len(history) < 2:
+        print('历史记录中少于两次运行，无法对比')
+        return 0
+    try:
+        base, head = history[args.against], history[args.head]
+    except IndexError:
+        print(f'下标超出范围：历史记录中共有 {len(history)} 次运行，'
+              f'可用下标为 {-len(history)} 到 {len(history) - 1}')
+        return 2
+    regressions = compare_runs(base, head, args.time_tol, args.mem_tol)
+    print(f"基线 {base['timestamp']} ({base['commit']}) -> "
+          f"当前 {head['timestamp']} ({head['commit']})")
+    if not regressions:
+        print('没有发现性能回退')
+        return 0
+    print(f'发现 {len(regressions)} 项回退：')
+    for (recipe, n, backend), metric, a, b, ratio in regressions:
+        print(f'  {recipe:<32} {n:>7} {backend:<4} {metric:<17}'
+              f' {a:>12.4g} -> {b:<12.4g} x{ratio:.2f}')
+    return 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='教程绘图套路的耗时与内存基准测试')
+    parser.add_argument('--history', default=DEFAULT_HISTORY)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('run', help='运行基准测试并追加到历史记录')
+    p.add_argument('-r', '--recipe', nargs='+')
+    p.add_argument('-b', '--backend', nargs='+', default=list(BACKENDS),
+                   choices=BACKENDS)
+    p.add_argument('--sizes', type=int, nargs='+',
+                   help='覆盖各套路的默认规模')
+    p.add_argument('--repeat', type=int, default=3)
+    p.set_defaults(func=run)
+
+    p = sub.add_parser('compare', help='对比历史记录中的两次运行')
+    p.add_argument('--against', type=int, default=-2,
+                   help='基线在历史记录中的下标，默认为倒数第二次')
+    p.add_argument('--head', type=int, default=-1)
+    p.add_argument('--time-tol', type=float, default=0.25)
+    p.add_argument('--mem-tol', type=float, default=0.10)
+    p.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""对比逐帧完整重绘与 fantastic.stream 的实时绘图吞吐量和帧耗时。
+
+用法::
+
+    python benchmarks/bench_stream.py [--series 8] [--frames 500] [--rate 50]
+                                      [--capacity 100000] [--window 10]
+
+模拟 ``--series`` 条曲线以 ``--rate`` Hz 的帧率接收数据，每帧每条曲线追加
+``--samples`` 个样本，x 轴显示最近 ``--window`` 秒。对比的写法是第一回、第二回中的
+``line.set_data`` 加 ``canvas.draw()``。
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.ticker import MaxNLocator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fantastic.stream import LivePlot  # noqa: E402
+
+
+def make_figure(n_series):
+    rows = max(1, n_series // 2)
+    cols = 2 if n_series > 1 else 1
+    fig, axs = plt.subplots(rows, cols, figsize=(10, 2 * rows), squeeze=False)
+    axes = list(axs.flat)[:n_series]
+    for ax in axes:
+        ax.xaxis.set_major_locator(MaxNLocator(nbins=6))
+    fig.tight_layout()
+    return fig, axes
+
+
+def frames(args):
+    # 带噪声的正弦信号，振幅缓慢漂移，模拟遥测数据
+    rng = np.random.default_rng(0)
+    dt = 1 / (args.rate * args.samples)
+    freq = rng.uniform(0.2, 2, args.series)[:, None]
+    for k in range(args.frames):
+        t = (k * args.samples + np.arange(args.samples)) * dt
+        y = ((1 + 0.01 * t) * np.sin(2 * np.pi * freq * t)
+             + rng.standard_normal((args.series, args.samples)) * 0.1)
+        yield t, y
+
+
+def run_redraw(args):
+    fig, axes = make_figure(args.series)
+    lines = [ax.plot([], [])[0] for ax in axes]
+    xs = [np.empty(0) for _ in axes]
+    ys = [np.empty(0) for _ in axes]
+    times = []
+    for t, y in frames(args):
+        t0 = time.perf_counter()
+        for i, (ax, line) in enumerate(zip(axes, lines)):
+            xs[i] = np.append(xs[i], t)[-args.capacity:]
+            ys[i] = np.append(ys[i], y[i])[-args.capacity:]
+            line.set_data(xs[i], ys[i])
+            ax.set_xlim(t[-1] - args.window, t[-1])
+            ax.relim()
+            ax.autoscale_view(scalex=False)
+        fig.canvas.draw()
+        times.append(time.perf_counter() - t0)
+    plt.close(fig)
+    return np.array(times), len(times)
+
+
+def run_live(args):
+    fig, axes = make_figure(args.series)
+    live = LivePlot(fig, window=args.window)
+    series = [live.line(ax, capacity=args.capacity) for ax in axes]
+    times = []
+    for t, y in frames(args):
+        t0 = time.perf_counter()
+        for s, yi in zip(series, y):
+            s.append(t, yi)
+        live.update()
+        times.append(time.perf_counter() - t0)
+    plt.close(fig)
+    return np.array(times), live.stats['full_redraws']
+
+
+def report(label, times, full, args):
+    total = times.sum()
+    samples = args.frames * args.series * args.samples
+    p50, p95 = np.percentile(times, [50, 95]) * 1e3
+    print(f'{label:<10} {args.frames / total:>8.1f} 帧/秒 '
+          f'{samples / total:>12.0f} 样本/秒 p50={p50:.2f}ms p95={p95:.2f}ms max={times.max() * 1e3:.2f}ms '
+          f'完整重绘 {full} 次')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--series', type=int, default=8)
+    parser.add_argument('--frames', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=50)
+    parser.add_argument('--samples', type=int, default=200,
+                        help='每帧每条曲线追加的样本数')
+    parser.add_argument('--capacity', type=int, default=100000)
+    parser.add_argument('--window', type=float, default=10)
+    args = parser.parse_args(argv)
+
+    t_redraw, n_redraw = run_redraw(args)
+    report('完整重绘', t_redraw, n_redraw, args)
+    t_live, n_live = run_live(args)
+    report('流式', t_live, n_live, args)
+    print(f'帧耗时中位数加速比: {np.median(t_redraw) / np.median(t_live):.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""对比启用 fantastic.textcache 前后重复生成同一张第四回报表图的耗时。
+
+用法::
+
+    python benchmarks/bench_textcache.py [--figures 10] [--curves 20] [--format png]
+    python benchmarks/bench_textcache.py --persist /tmp/textcache.pickle
+    python benchmarks/bench_textcache.py --check
+
+每张图包含 ``--curves`` 条带公式图例的曲线、旋转的标题和注释，并调用 ``tight_layout``
+后保存。给出 ``--persist`` 时先从该文件加载缓存，结束后写回，第二次运行即可看到
+跨进程复用的效果。``--check`` 不计时，而是在同一个进程中按交错的顺序把同一张图保存为
+png/svg/pdf/ps，逐字节比较启用缓存前后的输出。
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from fantastic import textcache  # noqa: E402
+from recipes import ticker_legend_mathtext  # noqa: E402
+
+
+CHECK_FORMATS = ('png', 'svg', 'pdf', 'ps')
+# 交错保存，确保一种格式的缓存结果不会被另一种格式取到
+CHECK_ORDER = ('svg', 'pdf', 'ps', 'png', 'ps', 'svg', 'png', 'pdf')
+
+
+def report_figure(curves, fmt, out=None):
+    fig = ticker_legend_mathtext(curves)
+    ax = fig.axes[0]
+    ax.set_title('Damped oscillations', rotation=5)
+    ax.annotate('local max', xy=(1, 0.8), xytext=(2, 0.6), rotation=30,
+                arrowprops={'arrowstyle': '->'})
+    ax.text(3, 0.2, r'$\cos(2 \pi x) \exp(-x/3)$', rotation=15)
+    fig.text(0.02, 0.5, 'amplitude\n(a.u.)', rotation=90, va='center')
+    fig.tight_layout()
+    fig.savefig(out or io.BytesIO(), format=fmt)
+    plt.close(fig)
+
+
+def render_bytes(curves, fmt):
+    buf = io.BytesIO()
+    report_figure(curves, fmt, buf)
+    return buf.getvalue()
+
+
+def check(args):
+    """启用缓存前后各格式的输出是否逐字节相同，返回不一致的次数。"""
+    # 固定时间戳和 SVG 的 id，使同一张图的输出可以逐字节比较
+    os.environ['SOURCE_DATE_EPOCH'] = '0'
+    matplotlib.rcParams['svg.hashsalt'] = 'textcache'
+    textcache.uninstall()
+    expected = {fmt: render_bytes(args.curves, fmt) for fmt in CHECK_FORMATS}
+    textcache.install()
+    failures = 0
+    # 第一轮填充缓存，第二轮全部命中
+    for _ in range(2):
+        for fmt in CHECK_ORDER:
+            same = render_bytes(args.curves, fmt) == expected[fmt]
+            failures += not same
+            print(f'{fmt:<4} {"一致" if same else "不一致"}')
+    textcache.uninstall()
+    print('全部一致' if not failures else f'{failures} 次输出不一致')
+    return failures
+
+
+def timed(label, args):
+    times = []
+    for _ in range(args.figures):
+        t0 = time.perf_counter()
+        report_figure(args.curves, args.format)
+        times.append(time.perf_counter() - t0)
+    print(f'{label:<12} 首张 {times[0] * 1e3:>8.1f}ms  '
+          f'其余平均 {sum(times[1:]) / max(len(times) - 1, 1) * 1e3:>8.1f}ms')
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--figures', type=int, default=10)
+    parser.add_argument('--curves', type=int, default=20)
+    parser.add_argument('--format', default='png', choices=CHECK_FORMATS)
+    parser.add_argument('--persist', default=None,
+                        help='缓存文件路径，运行前加载、结束后保存')
+    parser.add_argument('--check', action='store_true',
+                        help='只比较启用缓存前后各格式的输出是否一致')
+    args = parser.parse_args(argv)
+    if args.check:
+        return 1 if check(args) else 0
+
+    # 先完整跑一张图，排除导入和字体加载的开销
+    report_figure(2, args.format)
+    plain = timed('不使用缓存', args)
+
+    cache = textcache.install()
+    if args.persist:
+        print(f'从 {args.persist} 加载 {cache.load(args.persist)} 条缓存')
+    cached = timed('使用缓存', args)
+    for name, info in cache.stats().items():
+        print(f'  {name:<9} 命中 {info["hits"]:>7} 未命中 {info["misses"]:>6} '
+              f'命中率 {info["hit_rate"]:.1%} 条目 {info["entries"]}')
+    if args.persist:
+        print(f'已保存 {cache.save(args.persist)} 条缓存')
+    print(f'平均加速比: {sum(plain) / sum(cached):.2f}x')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""基准测试用的绘图套路，取自各章节的示例代码。
+
+每个套路是一个 ``func(n) -> Figure``，``n`` 控制规模（含义见各函数的说明），
+``SIZES`` 给出默认测试的规模。函数只负责创建图形，不做绘制和保存。
+"""
+
+import datetime
+import os
+import sys
+
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+import matplotlib.ticker as ticker
+import numpy as np
+from matplotlib.collections import PatchCollection
+from matplotlib.patches import Wedge
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fantastic import styles as fstyles  # noqa: E402
+from fantastic import textcache  # noqa: E402
+
+PRESENTATION = os.path.join(ROOT, 'file', 'presentation.mplstyle')
+INTERP_METHODS = [None, 'none', 'nearest', 'bilinear', 'bicubic', 'spline16',
+                  'spline36', 'hanning', 'hamming', 'hermite', 'kaiser',
+                  'quadric', 'catrom', 'gaussian', 'bessel', 'mitchell',
+                  'sinc', 'lanczos']
+
+
+def subplots_grid(n):
+    """第三回样例1：2x5 共享坐标轴的子图，每个子图 ``n`` 个散点。"""
+    rng = np.random.default_rng(0)
+    fig, axs = plt.subplots(2, 5, figsize=(10, 4), sharex=True, sharey=True)
+    fig.suptitle('样例1', size=20)
+    for i in range(2):
+        for j in range(5):
+            axs[i][j].scatter(rng.standard_normal(n), rng.standard_normal(n))
+            axs[i][j].set_title('第%d行，第%d列' % (i + 1, j + 1))
+            axs[i][j].set_xlim(-5, 5)
+            axs[i][j].set_ylim(-5, 5)
+            if i == 1:
+                axs[i][j].set_xlabel('横坐标')
+            if j == 0:
+                axs[i][j].set_ylabel('纵坐标')
+    fig.tight_layout()
+    return fig
+
+
+def gridspec_layout(n):
+    """第三回样例2、3：不等宽高的 GridSpec 和跨行跨列的子图，每个子图 ``n`` 个散点。"""
+    rng = np.random.default_rng(0)
+    fig = plt.figure(figsize=(10, 8))
+    outer = fig.add_gridspec(2, 1)
+    spec = outer[0].subgridspec(nrows=2, ncols=5, width_ratios=[1, 2, 3, 4, 5],
+                                height_ratios=[1, 3])
+    for i in range(2):
+        for j in range(5):
+            ax = fig.add_subplot(spec[i, j])
+            ax.scatter(rng.standard_normal(n), rng.standard_normal(n))
+            ax.set_title('第%d行，第%d列' % (i + 1, j + 1))
+    spec = outer[1].subgridspec(nrows=2, ncols=6,
+                                width_ratios=[2, 2.5, 3, 1, 1.5, 2],
+                                height_ratios=[1, 2])
+    for cell in (spec[0, :3], spec[0, 3:5], spec[:, 5], spec[1, 0],
+                 spec[1, 1:5]):
+        ax = fig.add_subplot(cell)
+        ax.scatter(rng.standard_normal(n), rng.standard_normal(n))
+    fig.suptitle('样例2', size=20)
+    fig.tight_layout()
+    return fig
+
+
+def patch_collection(n):
+    """第二回 PatchCollection：``n`` 个 Wedge 放进一个集合。"""
+    rng = np.random.default_rng(0)
+    fig, ax = plt.subplots()
+    centers = rng.random((n, 2))
+    theta1 = rng.random(n) * 360
+    patches = [Wedge(c, 0.05, t, t + 90) for c, t in zip(centers, theta1)]
+    p = PatchCollection(patches, alpha=0.4)
+    p.set_array(100 * rng.random(n))
+    ax.add_collection(p)
+    return fig
+
+
+def imshow_interpolation(n):
+    """第二回 imshow：3x6 个子图分别使用不同的插值方法显示 ``n x n`` 的数组。"""
+    rng = np.random.default_rng(0)
+    grid = rng.random((n, n))
+    fig, axs = plt.subplots(nrows=3, ncols=6, figsize=(9, 6),
+                            subplot_kw={'xticks': [], 'yticks': []})
+    for ax, method in zip(axs.flat, INTERP_METHODS):
+        ax.imshow(grid, interpolation=method, cmap='viridis')
+        ax.set_title(str(method))
+    fig.tight_layout()
+    return fig
+
+
+def ticker_legend_mathtext(n):
+    """第四回：``n`` 条曲线的图例和数学公式标签，以及 MaxNLocator、DayLocator 刻度。"""
+    x = np.linspace(0, 5, 200)
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(6, 6))
+    for k in range(n):
+        ax1.plot(x, np.cos(2 * np.pi * x) * np.exp(-x / (k + 1)),
+                 label=r'$\cos(2 \pi x) \exp(-x/%d)$' % (k + 1))
+    ax1.text(1, -0.6, r'$\sum_{i=0}^\infty x_i$', fontsize=20)
+    ax1.xaxis.set_major_locator(ticker.MaxNLocator(nbins=10))
+    ax1.xaxis.set_major_formatter(ticker.FormatStrFormatter('%1.2f'))
+    ax1.legend(loc='upper right', ncol=max(1, n // 20), fontsize='small')
+
+    base = datetime.datetime(2017, 1, 1)
+    dates = [base + datetime.timedelta(days=d) for d in range(0, 28 * n, 7)]
+    ax2.plot(dates, np.arange(len(dates)))
+    ax2.xaxis.set_major_locator(mdates.DayLocator(bymonthday=[1, 15, 25]))
+    ax2.xaxis.set_major_formatter(mdates.DateFormatter('%b %d'))
+    fig.autofmt_xdate()
+    return fig
+
+
+def ticker_legend_mathtext_textcache(n):
+    """同 :func:`ticker_legend_mathtext`，启用 ``fantastic.textcache`` 的文字排版缓存。"""
+    textcache.install()
+    return ticker_legend_mathtext(n)
+
+
+def _style_switching(n, use):
+    styles = ['default', 'ggplot', ['dark_background', PRESENTATION],
+              'bmh', PRESENTATION]
+    for k in range(n):
+        use(styles[k % len(styles)])
+    fig, ax = plt.subplots()
+    ax.plot([1, 2, 3, 4], [2, 3, 4, 5])
+    use('default')
+    return fig
+
+
+def style_switching(n):
+    """第五回：用 ``plt.style.use`` 切换 ``n`` 次样式（含叠加样式）后作图。"""
+    return _style_switching(n, plt.style.use)
+
+
+def style_switching_registry(n):
+    """同 :func:`style_switching`，改用 ``fantastic.styles`` 的预展开缓存。"""
+    return _style_switching(n, fstyles.use)
+
+
+RECIPES = {
+    'subplots_grid': subplots_grid,
+    'gridspec_layout': gridspec_layout,
+    'patch_collection': patch_collection,
+    'imshow_interpolation': imshow_interpolation,
+    'ticker_legend_mathtext': ticker_legend_mathtext,
+    'ticker_legend_mathtext_textcache': ticker_legend_mathtext_textcache,
+    'style_switching': style_switching,
+    'style_switching_registry': style_switching_registry,
+}
+
+SIZES = {
+    'subplots_grid': [10, 1000, 100000],
+    'gridspec_layout': [10, 1000, 100000],
+    'patch_collection': [4, 1000, 20000],
+    'imshow_interpolation': [4, 64, 512],
+    'ticker_legend_mathtext': [2, 20, 100],
+    'ticker_legend_mathtext_textcache': [2, 20, 100],
+    'style_switching': [1, 20, 200],
+    'style_switching_registry': [1, 20, 200],
+}
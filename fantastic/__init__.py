@@ -0,0 +1,28 @@
+"""fantastic: 教程配套的绘图工具集。
+
+各章节中的示例代码以演示为主，这里把其中在生产环境里会反复用到的套路
+整理成可复用的函数，按模块划分：
+
+- ``fantastic.hist``：向量化的直方图构建，替代第二回逐个 ``Rectangle`` 的写法
+- ``fantastic.runner``：并行、带缓存的章节执行器（``python -m fantastic.runner``）
+- ``fantastic.styles``：离线样式表注册中心，叠加样式预先展开并缓存在磁盘上
+- ``fantastic.fonts``：持久化的字体索引，按字符覆盖范围查找能显示中文等文字的字体
+- ``fantastic.density``：把大规模散点聚合为像素网格，用 ``AxesImage`` 显示
+- ``fantastic.batch``：小多图的模板复用批量渲染，版式只创建一次，每批只替换数据
+- ``fantastic.data``：``data/*.csv`` 的内存映射列式缓存，只读取作图用到的列
+- ``fantastic.stream``：环形缓冲区加 blitting 的流式实时绘图，只在数据越出视图时完整重绘
+- ``fantastic.textcache``：进程级的文字尺寸、排版、公式和字形位图 LRU 缓存，可保存到磁盘
+"""
+
+from .density import DensityImage, aggregate, density_scatter
+from .hist import histogram, hist_collection, hist_patches, iter_column
+
+__all__ = [
+    'DensityImage',
+    'aggregate',
+    'density_scatter',
+    'histogram',
+    'hist_collection',
+    'hist_patches',
+    'iter_column',
+]
@@ -0,0 +1,24 @@
+"""各模块共用的路径常量和缓存辅助函数。"""
+
+import hashlib
+import os
+import re
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE = os.path.join(ROOT, '.fantastic_cache')
+
+# 形如 https://raw.githubusercontent.com/<owner>/<repo>/main/<path> 的链接
+RAW_URL = re.compile(r'^https?://[^/]+/[^/]+/[^/]+/(?:main|master)/(.+)$')
+
+
+def file_digest(path, _memo={}):
+    """文件内容的哈希，按 (路径, mtime, 大小) 在进程内缓存。"""
+    st = os.stat(path)
+    memo_key = (path, st.st_mtime_ns, st.st_size)
+    if memo_key not in _memo:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        _memo[memo_key] = h.hexdigest()
+    return _memo[memo_key]
@@ -0,0 +1,257 @@
+"""小多图（small multiples）的模板复用批量渲染。
+
+第三回中 ``plt.subplots(2, 5, figsize=(10, 4), sharex=True, sharey=True)`` 和
+``GridSpec`` 的例子每画一张图都要重新创建画布、坐标轴、刻度、边框并计算
+``tight_layout``。当同一种版式要画成千上万次时，这些工作都是重复的。这里的做法是：
+
+1. 按给定的版式只创建一次图形，固定坐标轴范围，计算一次 ``tight_layout``；
+2. 数据相关的图形（散点、折线，以及可选的子图标题）设为 ``animated``，先绘制
+   一遍其余部分并缓存为背景；
+3. 每批数据只替换图形的数据（``set_offsets``、``set_data``），恢复背景后用
+   ``draw_artist`` 重绘这几个图形，直接取出 Agg 的像素缓冲区；
+4. 各批数据分发到进程池中，每个进程只创建一次模板，结果写成单独的 PNG，
+   或拼成雪碧图（sprite sheet）并附带记录每帧位置的 JSON。
+
+示例::
+
+    from fantastic.batch import render_batches
+
+    spec = dict(nrows=2, ncols=5, figsize=(10, 4), xlim=(-5, 5), ylim=(-5, 5))
+    batches = ([{'offsets': rng.standard_normal((10, 2))} for _ in range(10)]
+               for _ in range(10000))
+    render_batches(spec, batches, 'out/', per_sheet=16)
+"""
+
+import itertools
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.image import imsave
+
+PanelArtists = namedtuple('PanelArtists', ['scatter', 'line', 'title'])
+
+
+class GridTemplate:
+    """只创建一次的子图网格模板。
+
+    Parameters
+    ----------
+    nrows, ncols : int
+        子图网格的行列数。
+    figsize, dpi
+        画布尺寸与分辨率。
+    xlim, ylim : (float, float)
+        所有子图固定使用的坐标轴范围，渲染时不会重新计算。
+    kinds : tuple of {'scatter', 'line'}
+        每个子图中预先放置的图形。
+    sharex, sharey : bool
+        与 ``plt.subplots`` 相同。
+    width_ratios, height_ratios : list of float, optional
+        与 ``GridSpec`` 相同。
+    titles : list of str, optional
+        固定的子图标题，按 ``axes.flat`` 的顺序排列。
+    dynamic_titles : bool
+        为 True 时子图标题随每批数据变化（面板数据中的 ``'title'`` 键）。
+    suptitle, xlabel, ylabel : str, optional
+        总标题；x、y 轴标签只加在最下一行和最左一列。
+    scatter_kw, line_kw : dict, optional
+        传给 ``ax.scatter``、``ax.plot``。散点按 ``c`` 着色时应在这里给出
+        ``vmin``、``vmax``，否则颜色范围由第一批数据决定。
+    """
+
+    def __init__(self, nrows=2, ncols=5, figsize=(10, 4), dpi=100,
+                 xlim=(0, 1), ylim=(0, 1), kinds=('scatter',), sharex=True,
+                 sharey=True, width_ratios=None, height_ratios=None,
+                 titles=None, dynamic_titles=False, suptitle=None, xlabel=None,
+                 ylabel=None, scatter_kw=None, line_kw=None):
+        self.figure = fig = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(fig)
+        axs = fig.subplots(nrows, ncols, sharex=sharex, sharey=sharey,
+                           squeeze=False,
+                           gridspec_kw={'width_ratios': width_ratios,
+                                        'height_ratios': height_ratios})
+        self.axes = list(axs.flat)
+        if suptitle:
+            fig.suptitle(suptitle, size=20)
+
+        self.panels = []
+        self._colormapped = False
+        for k, ax in enumerate(self.axes):
+            ax.set_xlim(*xlim)
+            ax.set_ylim(*ylim)
+            i, j = divmod(k, ncols)
+            if xlabel and i == nrows - 1:
+                ax.set_xlabel(xlabel)
+            if ylabel and j == 0:
+                ax.set_ylabel(ylabel)
+            scatter = line = title = None
+            if 'scatter' in kinds:
+                kw = dict(scatter_kw or {})
+                if {'cmap', 'norm', 'vmin', 'vmax'} & kw.keys():
+                    # 需要按数值着色时先给一个空的颜色数组
+                    kw.setdefault('c', np.empty(0))
+                    self._colormapped = True
+                scatter = ax.scatter(np.empty(0), np.empty(0), **kw)
+                scatter.set_animated(True)
+            if 'line' in kinds:
+                line, = ax.plot([], [], **(line_kw or {}))
+                line.set_animated(True)
+            if titles is not None:
+                ax.set_title(titles[k])
+            if dynamic_titles:
+                title = ax.title
+                # 占位文字用于在 tight_layout 中给标题留出空间
+                title.set_text('Xg')
+                title.set_animated(True)
+            self.panels.append(PanelArtists(scatter, line, title))
+
+        fig.tight_layout()
+        self.canvas.draw()
+        self._background = self.canvas.copy_from_bbox(fig.bbox)
+
+    @property
+    def shape(self):
+        """渲染结果的 ``(高, 宽)``，单位为像素。"""
+        w, h = self.canvas.get_width_height()
+        return h, w
+
+    def render(self, panels):
+        """用一批数据渲染模板，返回 ``(高, 宽, 4)`` 的 RGBA 数组。
+
+        ``panels`` 按 ``axes.flat`` 的顺序给出每个子图的数据字典，可包含：
+        ``'offsets'``（``(n, 2)`` 散点坐标）、``'c'``（散点颜色值）、
+        ``'x'``/``'y'``（折线数据）、``'title'``。缺少的子图被清空。
+        ``scatter_kw`` 中给出了颜色映射时，有散点的子图必须给出 ``'c'``；否则没有
+        ``'c'`` 的子图使用 ``scatter_kw`` 中的固定颜色，不会沿用上一批的颜色值。
+        """
+        self.canvas.restore_region(self._background)
+        for ax, arts, data in itertools.zip_longest(self.axes, self.panels,
+                                                    panels[:len(self.axes)]):
+            data = data or {}
+            if arts.scatter is not None:
+                offsets = data.get('offsets', np.empty((0, 2)))
+                arts.scatter.set_offsets(offsets)
+                if 'c' in data:
+                    arts.scatter.set_array(np.asarray(data['c']))
+                elif self._colormapped and len(offsets):
+                    raise ValueError('模板按颜色映射绘制散点，面板数据中缺少 c')
+                else:
+                    arts.scatter.set_array(None)
+                ax.draw_artist(arts.scatter)
+            if arts.line is not None:
+                arts.line.set_data(data.get('x', []), data.get('y', []))
+                ax.draw_artist(arts.line)
+            if arts.title is not None:
+                arts.title.set_text(data.get('title', ''))
+                ax.draw_artist(arts.title)
+        return np.asarray(self.canvas.buffer_rgba()).copy()
+
+
+def tile(frames, cols):
+    """把若干等大的 RGBA 帧按 ``cols`` 列拼接，返回 ``(图像, 帧位置列表)``。"""
+    h, w = frames[0].shape[:2]
+    rows = -(-len(frames) // cols)
+    sheet = np.zeros((rows * h, cols * w, 4), dtype=np.uint8)
+    rects = []
+    for k, frame in enumerate(frames):
+        r, c = divmod(k, cols)
+        sheet[r * h:(r + 1) * h, c * w:(c + 1) * w] = frame
+        rects.append({'x': c * w, 'y': r * h, 'w': w, 'h': h})
+    return sheet, rects
+
+
+_template = None
+
+
+def _init_worker(spec):
+    global _template
+    _template = GridTemplate(**spec)
+
+
+def _render_task(task):
+    outdir, start, group, cols = task
+    frames = [_template.render(panels) for panels in group]
+    if cols is None:
+        paths = []
+        for k, frame in enumerate(frames):
+            path = os.path.join(outdir, f'batch_{start + k:06d}.png')
+            imsave(path, frame)
+            paths.append(path)
+        return paths
+    sheet, rects = tile(frames, cols)
+    name = f'sheet_{start:06d}'
+    path = os.path.join(outdir, name + '.png')
+    imsave(path, sheet)
+    index = [dict(rect, batch=start + k) for k, rect in enumerate(rects)]
+    with open(os.path.join(outdir, name + '.json'), 'w',
+              encoding='utf-8') as f:
+        json.dump(index, f)
+    return [path]
+
+
+def _groups(batches, size):
+    it = iter(batches)
+    start = 0
+    while True:
+        group = list(itertools.islice(it, size))
+        if not group:
+            return
+        yield start, group
+        start += len(group)
+
+
+def render_batches(spec, batches, outdir, per_sheet=None, sheet_cols=None,
+                   jobs=None, group_size=16):
+    """在进程池中用同一个模板渲染多批数据，返回写出的文件路径列表。
+
+    Parameters
+    ----------
+    spec : dict
+        :class:`GridTemplate` 的参数，每个进程据此创建一次模板。
+    batches : iterable
+        每个元素是传给 :meth:`GridTemplate.render` 的面板数据列表，可以是生成器。
+    outdir : str
+        输出目录。
+    per_sheet : int, optional
+        给出时每 ``per_sheet`` 批拼成一张雪碧图（``sheet_<起始批号>.png``，
+        帧位置见同名 ``.json``），否则每批写一个 ``batch_<批号>.png``。
+    sheet_cols : int, optional
+        雪碧图的列数，默认接近正方形。
+    jobs : int, optional
+        进程数，默认为 CPU 核数；为 1 时在当前进程中渲染。
+    group_size : int
+        不拼图时每个进程任务包含的批数。
+    """
+    os.makedirs(outdir, exist_ok=True)
+    if per_sheet:
+        size = per_sheet
+        cols = sheet_cols or int(np.ceil(np.sqrt(per_sheet)))
+    else:
+        size, cols = group_size, None
+    tasks = ((outdir, start, group, cols)
+             for start, group in _groups(batches, size))
+
+    jobs = jobs or os.cpu_count() or 1
+    paths = []
+    if jobs == 1:
+        _init_worker(spec)
+        for task in tasks:
+            paths.extend(_render_task(task))
+        return paths
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(spec,)) as pool:
+        # 限制同时提交的任务数，避免生成器中的数据被一次性读入内存
+        pending = []
+        for task in tasks:
+            pending.append(pool.submit(_render_task, task))
+            if len(pending) >= jobs * 4:
+                paths.extend(pending.pop(0).result())
+        for future in pending:
+            paths.extend(future.result())
+    return paths
@@ -0,0 +1,208 @@
+"""``data/*.csv`` 的内存映射列式缓存。
+
+各章节和下游脚本每次运行都要用 pandas 从文本重新解析 ``data/`` 下的 csv 文件。
+这里把每个 csv 转换一次，按列保存为 ``.npy`` 文件：
+
+- 数值列和布尔列保留 pandas 推断出的类型；
+- 其他列做字典编码，保存为最小够用的整数编码数组，类别另存为 JSON，缺失值编码为 -1；
+- 缓存按源文件的 mtime 和大小校验，二者变化时再比较内容哈希，内容确实变了才重新转换；
+- 读取时用 ``np.load(mmap_mode='r')`` 按需打开用到的列，多个进程共享同一份页缓存。
+
+示例::
+
+    from fantastic import data
+
+    diamonds = data.load('diamonds')
+    plt.scatter(diamonds['carat'], diamonds['price'])   # 只会映射这两列
+    diamonds['cut']                                       # pandas.Categorical
+    df = diamonds.to_frame(['carat', 'cut'])
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from ._cache import DEFAULT_CACHE, ROOT, file_digest
+
+DATA_DIR = os.path.join(ROOT, 'data')
+_FORMAT_VERSION = 1
+
+
+def resolve(name):
+    """数据集名（如 ``'diamonds'``）或 csv 路径 -> 绝对路径。
+
+    只有含路径分隔符或以 ``.csv`` 结尾的 ``name`` 才按路径查找（相对于当前目录），
+    其余的只在 ``data/`` 目录下查找，当前目录中的同名文件不会被误用。
+    """
+    seps = (os.sep, os.altsep) if os.altsep else (os.sep,)
+    if any(sep in name for sep in seps) or name.endswith('.csv'):
+        if os.path.isfile(name):
+            return os.path.abspath(name)
+        if name != os.path.basename(name):
+            raise FileNotFoundError(f'找不到数据集 {name!r}')
+    path = os.path.join(DATA_DIR, name if name.endswith('.csv')
+                        else name + '.csv')
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f'找不到数据集 {name!r}')
+    return path
+
+
+def _code_dtype(n):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def convert(source, dest, read_csv_kw=None):
+    """把 csv 转换为列式缓存目录 ``dest``，返回 meta 字典。"""
+    kw = {'encoding': 'utf-8-sig'}
+    kw.update(read_csv_kw or {})
+    df = pd.read_csv(source, **kw)
+    columns = []
+    for i, name in enumerate(df.columns):
+        s = df[name]
+        entry = {'name': str(name), 'file': f'c{i}.npy'}
+        if pd.api.types.is_bool_dtype(s) or pd.api.types.is_numeric_dtype(s):
+            arr = s.to_numpy()
+            entry['kind'] = 'numeric'
+        else:
+            codes, categories = pd.factorize(s, use_na_sentinel=True)
+            arr = codes.astype(_code_dtype(len(categories)))
+            entry['kind'] = 'category'
+            entry['categories'] = [str(c) for c in categories]
+        np.save(os.path.join(dest, entry['file']), np.ascontiguousarray(arr))
+        entry['dtype'] = str(arr.dtype)
+        columns.append(entry)
+
+    st = os.stat(source)
+    meta = {'version': _FORMAT_VERSION, 'source': source,
+            'mtime_ns': st.st_mtime_ns, 'size': st.st_size,
+            'sha256': file_digest(source), 'rows': len(df),
+            'read_csv_kw': read_csv_kw or {}, 'columns': columns}
+    _write_meta(dest, meta)
+    return meta
+
+
+class Table:
+    """一个已缓存的数据集，列在第一次访问时才映射进内存。"""
+
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = meta
+        self._columns = {c['name']: c for c in meta['columns']}
+        self._arrays = {}
+
+    def __repr__(self):
+        return (f"<Table {os.path.basename(self.meta['source'])}: "
+                f"{len(self)} 行, {len(self._columns)} 列>")
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def codes(self, name):
+        """列的原始数组（数值列即数据本身，类别列为编码），只读的内存映射。"""
+        if name not in self._arrays:
+            entry = self._columns[name]
+            self._arrays[name] = np.load(os.path.join(self.path, entry['file']),
+                                         mmap_mode='r')
+        return self._arrays[name]
+
+    def categories(self, name):
+        return self._columns[name].get('categories')
+
+    def __getitem__(self, name):
+        """数值列返回内存映射数组，类别列返回 ``pandas.Categorical``。"""
+        arr = self.codes(name)
+        categories = self.categories(name)
+        if categories is None:
+            return arr
+        return pd.Categorical.from_codes(arr, categories=categories)
+
+    def to_frame(self, columns=None):
+        """转换为 DataFrame，``columns`` 缺省时包含全部列。"""
+        columns = columns or self.columns
+        return pd.DataFrame({name: self[name] for name in columns},
+                            columns=columns)
+
+
+def _cache_path(source, cache_dir, read_csv_kw):
+    key = hashlib.sha256(
+        (source + '\0' + json.dumps(read_csv_kw or {}, sort_keys=True))
+        .encode('utf-8')).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(cache_dir, 'data', f'{stem}-{key}')
+
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('version') == _FORMAT_VERSION else None
+
+
+def _write_meta(path, meta):
+    fd, tmp = tempfile.mkstemp(dir=path, suffix='.json')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, os.path.join(path, 'meta.json'))
+
+
+def _is_fresh(meta, source, path):
+    st = os.stat(source)
+    if (meta['mtime_ns'], meta['size']) == (st.st_mtime_ns, st.st_size):
+        return True
+    # mtime 变了但内容可能没变（例如重新 checkout），比较哈希
+    if meta['sha256'] != file_digest(source):
+        return False
+    # 内容没变，记下新的 mtime，之后不必每次都重新计算哈希
+    meta['mtime_ns'], meta['size'] = st.st_mtime_ns, st.st_size
+    try:
+        _write_meta(path, meta)
+    except OSError:
+        pass
+    return True
+
+
+def load(name, cache_dir=DEFAULT_CACHE, read_csv_kw=None):
+    """打开一个数据集的列式缓存，缓存缺失或过期时先转换。"""
+    source = resolve(name)
+    path = _cache_path(source, cache_dir, read_csv_kw)
+    meta = _read_meta(path)
+    if meta is not None and _is_fresh(meta, source, path):
+        return Table(path, meta)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=os.path.dirname(path))
+    try:
+        meta = convert(source, tmp, read_csv_kw)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+    except OSError:
+        # 其他进程已经写入了新的缓存
+        shutil.rmtree(tmp, ignore_errors=True)
+        meta = _read_meta(path)
+        if meta is None:
+            raise
+    return Table(path, meta)
+
+
+def available():
+    """``data/`` 目录下的数据集名。"""
+    return sorted(os.path.splitext(f)[0] for f in os.listdir(DATA_DIR)
+                  if f.endswith('.csv'))
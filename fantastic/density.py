@@ -0,0 +1,236 @@
+"""大规模散点图的聚合栅格化绘制。
+
+第二、三、五回中的散点图（``plt.scatter(x, y, s=s)``、
+``scatter(x, y, c=x, cmap='RdPu')`` 等）为每个点生成一个标记路径，点数到了
+百万、千万级别时绘制很慢，SVG/PDF 文件也会变得非常大。这里改为：
+
+1. 按坐标轴当前的像素尺寸划分网格，用 NumPy 向量化地把点落到格子里，
+   统计每个格子的点数，或某一列数值的均值/最大值/总和；
+2. 网格经过 colormap 着色后，用第二回介绍的 ``AxesImage`` 显示；
+3. 每次绘制前检查视图范围和像素尺寸，缩放、平移或改变图像大小后自动重新聚合。
+
+数据可以按块提供，内存占用只与网格大小和单块大小有关，与总点数无关。
+
+示例::
+
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    from fantastic import density_scatter
+
+    def chunks():
+        for df in pd.read_csv('data/diamonds.csv', usecols=['carat', 'price'],
+                              chunksize=10000):
+            yield df['carat'].to_numpy(), df['price'].to_numpy()
+
+    fig, ax = plt.subplots()
+    img = density_scatter(ax, chunks=chunks, cmap='RdPu', norm='log')
+    fig.colorbar(img)
+"""
+
+import numpy as np
+from matplotlib.image import AxesImage
+
+_HOW = ('count', 'sum', 'mean', 'max')
+
+
+def _array_chunks(x, y, c, chunksize):
+    n = len(x)
+    for start in range(0, n, chunksize):
+        stop = start + chunksize
+        if c is None:
+            yield x[start:stop], y[start:stop]
+        else:
+            yield x[start:stop], y[start:stop], c[start:stop]
+
+
+def data_extent(chunks):
+    """遍历一遍数据，返回 ``(xmin, xmax, ymin, ymax)``，忽略非有限值。"""
+    lo = np.array([np.inf, np.inf])
+    hi = -lo
+    for chunk in chunks:
+        for i in (0, 1):
+            a = np.asarray(chunk[i], dtype=float)
+            a = a[np.isfinite(a)]
+            if a.size:
+                lo[i] = min(lo[i], a.min())
+                hi[i] = max(hi[i], a.max())
+    if not np.all(np.isfinite(lo)):
+        raise ValueError('没有有限的数据点')
+    return lo[0], hi[0], lo[1], hi[1]
+
+
+def _cell_index(v, v0, v1, n):
+    """坐标 -> 格子下标（浮点数），范围之外的下标落在 ``[0, n)`` 之外。"""
+    if v1 == v0:
+        # 范围宽度为 0 时只保留恰好落在该坐标上的点，放在第一格
+        return np.where(v == v0, 0.0, -1.0)
+    i = np.floor((v - v0) * (n / (v1 - v0)))
+    # 右、上边界上的点归入最后一格
+    i[v == v1] = n - 1
+    return i
+
+
+def aggregate(chunks, extent, shape, how='count'):
+    """把散点聚合到网格上，返回形如 ``shape`` 的掩码数组，空格子被掩去。
+
+    Parameters
+    ----------
+    chunks : iterable
+        由 ``(x, y)`` 或 ``(x, y, c)`` 组成的可迭代对象。
+    extent : (x0, x1, y0, y1)
+        网格覆盖的数据范围，范围之外的点被忽略。
+    shape : (ny, nx)
+        网格的行数和列数，第 0 行对应 ``y0``。
+    how : {'count', 'sum', 'mean', 'max'}
+        除 ``'count'`` 外都需要 ``c`` 列。
+    """
+    if how not in _HOW:
+        raise ValueError(f'how 必须是 {_HOW} 之一')
+    x0, x1, y0, y1 = extent
+    ny, nx = shape
+    size = nx * ny
+    counts = np.zeros(size, dtype=np.int64)
+    acc = None
+    if how in ('sum', 'mean'):
+        acc = np.zeros(size)
+    elif how == 'max':
+        acc = np.full(size, -np.inf)
+
+    for chunk in chunks:
+        x = np.asarray(chunk[0], dtype=float)
+        y = np.asarray(chunk[1], dtype=float)
+        ix = _cell_index(x, x0, x1, nx)
+        iy = _cell_index(y, y0, y1, ny)
+        inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+        if acc is not None:
+            if len(chunk) < 3:
+                raise ValueError(f"how={how!r} 需要提供数值列 c")
+            c = np.asarray(chunk[2], dtype=float)
+            inside &= np.isfinite(c)
+            c = c[inside]
+        flat = iy[inside].astype(np.intp) * nx + ix[inside].astype(np.intp)
+        counts += np.bincount(flat, minlength=size)
+        if how in ('sum', 'mean'):
+            acc += np.bincount(flat, weights=c, minlength=size)
+        elif how == 'max':
+            np.maximum.at(acc, flat, c)
+
+    empty = counts == 0
+    if how == 'count':
+        grid = counts.astype(float)
+    elif how == 'mean':
+        with np.errstate(invalid='ignore', divide='ignore'):
+            grid = acc / counts
+    else:
+        grid = acc
+    return np.ma.masked_array(grid.reshape(shape), mask=empty.reshape(shape))
+
+
+class DensityImage(AxesImage):
+    """按视图重新聚合的散点密度图像。
+
+    每次绘制前检查坐标轴的视图范围和像素尺寸，发生变化时重新调用
+    :func:`aggregate`，因此缩放、平移和以不同 dpi 保存都能得到像素级的网格。
+    只支持线性坐标轴，对数等其他坐标轴会抛出 ``ValueError``。
+
+    Parameters
+    ----------
+    ax : Axes
+    source : callable
+        每次调用返回一个新的 ``(x, y[, c])`` 分块迭代器。
+    how : {'count', 'sum', 'mean', 'max'}
+    pixel_size : float
+        每个格子占据的屏幕像素数，大于 1 时网格更粗。
+    **kwargs
+        传给 ``AxesImage``，如 ``cmap``、``norm``、``alpha``。
+    """
+
+    def __init__(self, ax, source, how='count', pixel_size=1.0, **kwargs):
+        kwargs.setdefault('interpolation', 'nearest')
+        kwargs.setdefault('origin', 'lower')
+        super().__init__(ax, **kwargs)
+        if how not in _HOW:
+            raise ValueError(f'how 必须是 {_HOW} 之一')
+        self._source = source
+        self.how = how
+        self.pixel_size = pixel_size
+        self._state = None
+        self._autoscale = self.norm.vmin is None and self.norm.vmax is None
+
+    def _view_state(self):
+        ax = self.axes
+        bbox = ax.get_window_extent()
+        nx = max(1, int(np.ceil(bbox.width / self.pixel_size)))
+        ny = max(1, int(np.ceil(bbox.height / self.pixel_size)))
+        x0, x1 = sorted(ax.get_xlim())
+        y0, y1 = sorted(ax.get_ylim())
+        return (x0, x1, y0, y1), (ny, nx)
+
+    def update_grid(self):
+        """视图或像素尺寸变化时重新聚合，返回是否进行了聚合。"""
+        _check_linear(self.axes)
+        state = self._view_state()
+        if state == self._state:
+            return False
+        extent, shape = state
+        grid = aggregate(self._source(), extent, shape, self.how)
+        self.set_data(grid)
+        self.set_extent(extent)
+        if self._autoscale and grid.count():
+            self.norm.vmin = self.norm.vmax = None
+            self.norm.autoscale_None(grid)
+        self._state = state
+        return True
+
+    def draw(self, renderer):
+        self.update_grid()
+        super().draw(renderer)
+
+
+def _check_linear(ax):
+    scales = ax.get_xscale(), ax.get_yscale()
+    if scales != ('linear', 'linear'):
+        raise ValueError(f'密度图只支持线性坐标轴，当前为 {scales}')
+
+
+def density_scatter(ax, x=None, y=None, c=None, *, chunks=None, how=None,
+                    extent=None, chunksize=1_000_000, pixel_size=1.0,
+                    **kwargs):
+    """把散点聚合为密度图像绘制在 ``ax`` 上，返回 :class:`DensityImage`。
+
+    可以像 ``scatter`` 一样传入 ``x``、``y``（以及 ``c``），也可以通过
+    ``chunks`` 传入一个每次调用都返回新分块迭代器的函数。``how`` 默认在给出
+    ``c`` 时为 ``'mean'``，否则为 ``'count'``。``extent`` 缺省时遍历一遍数据确定
+    初始的坐标轴范围。其余参数（``cmap``、``norm``、``vmin``、``vmax`` 等）
+    传给 ``AxesImage``。
+    """
+    _check_linear(ax)
+    if chunks is None:
+        if x is None or y is None:
+            raise ValueError('必须提供 x、y 或 chunks')
+        x = np.asarray(x)
+        y = np.asarray(y)
+        if c is not None:
+            c = np.asarray(c)
+        chunks = lambda: _array_chunks(x, y, c, chunksize)  # noqa: E731
+        has_c = c is not None
+    else:
+        has_c = None
+    if how is None:
+        how = 'mean' if has_c else 'count'
+
+    vmin = kwargs.pop('vmin', None)
+    vmax = kwargs.pop('vmax', None)
+    img = DensityImage(ax, chunks, how=how, pixel_size=pixel_size, **kwargs)
+    if vmin is not None or vmax is not None:
+        img.set_clim(vmin, vmax)
+        img._autoscale = False
+
+    if extent is None:
+        extent = data_extent(chunks())
+    img.set_data(np.ma.masked_all((1, 1)))
+    ax.add_image(img)
+    img.set_extent(extent)
+    # 先按当前视图聚合一次，保证 colorbar 等在绘制前就能拿到数据范围
+    img.update_grid()
+    return img
@@ -0,0 +1,283 @@
+"""持久化的字体索引，按字符覆盖范围查找字体。
+
+第四回中查找中文字体的方式是手动遍历 ``font_manager.fontManager.ttflist``，
+或者写死 ``FontProperties(fname=r'C:\\Windows\\Fonts\\simhei.ttf')``，在 Linux 上
+要么找不到文件，要么在冷启动时触发一次完整的字体扫描。这里为每个已安装的字体
+记录字族、样式、字重和一份紧凑的 Unicode 覆盖位图（按 256 个码位分块，每块一个
+整数位掩码），保存在磁盘上：
+
+- 索引在第一次查询时才加载；
+- 加载时只检查字体目录的 mtime，只有发生变化的目录才会重新列出并解析其中的新字体；
+- 查询"能完整显示这段文字的最佳字体"只需要位运算，结果还会在进程内缓存；
+  进程内缓存未命中时再检查一次字体目录的 mtime，运行期间安装的字体也能被找到。
+
+示例::
+
+    import matplotlib.pyplot as plt
+    from fantastic import fonts
+
+    prop = fonts.font_properties('小示例图标签', family=['SimHei', 'sans-serif'])
+    plt.legend(loc='lower right', prop=prop)
+"""
+
+import functools
+import os
+import pickle
+import sys
+import tempfile
+from collections import namedtuple
+
+from matplotlib import font_manager, ft2font, get_data_path, rcParams
+
+from ._cache import DEFAULT_CACHE
+
+FontRecord = namedtuple('FontRecord', ['path', 'mtime_ns', 'size', 'family',
+                                       'style', 'weight', 'blocks'])
+
+_FONT_EXTENSIONS = ('.ttf', '.otf', '.ttc')
+_INDEX_VERSION = 1
+_GENERIC_FAMILIES = ('serif', 'sans-serif', 'cursive', 'fantasy', 'monospace')
+# 只有占位符号、没有真正字形的兜底字体，不参与查找
+_PLACEHOLDER_FAMILIES = ('Last Resort',)
+
+
+def font_directories():
+    """当前平台上的字体目录，另加 matplotlib 自带的字体目录。"""
+    if sys.platform == 'win32':
+        dirs = [font_manager.win32FontDirectory(),
+                *font_manager.MSUserFontDirectories]
+    elif sys.platform == 'darwin':
+        dirs = list(font_manager.OSXFontDirectories)
+    else:
+        dirs = list(font_manager.X11FontDirectories)
+    dirs.append(os.path.join(get_data_path(), 'fonts', 'ttf'))
+    return [os.path.abspath(d) for d in dirs if os.path.isdir(d)]
+
+
+def coverage_blocks(codepoints):
+    """把码位集合编码为 ``{块号: 位掩码}``，每块 256 个码位。"""
+    blocks = {}
+    for cp in codepoints:
+        blocks[cp >> 8] = blocks.get(cp >> 8, 0) | (1 << (cp & 0xff))
+    return blocks
+
+
+def _weight_value(weight):
+    if isinstance(weight, str):
+        return font_manager.weight_dict.get(weight, 400)
+    return int(weight)
+
+
+def read_font(path, st=None):
+    """解析一个字体文件，返回 :class:`FontRecord`。
+
+    无法解析的文件也会记录下来（``family`` 为 None），避免每次刷新都重新解析。
+    """
+    st = st or os.stat(path)
+    try:
+        font = ft2font.FT2Font(path)
+        entry = font_manager.ttfFontProperty(font)
+        if entry.name.startswith(_PLACEHOLDER_FAMILIES):
+            raise ValueError(entry.name)
+        blocks = coverage_blocks(font.get_charmap())
+    except Exception:
+        return FontRecord(path, st.st_mtime_ns, st.st_size, None, None, 0, {})
+    return FontRecord(path, st.st_mtime_ns, st.st_size, entry.name,
+                      entry.style, _weight_value(entry.weight), blocks)
+
+
+class FontIndex:
+    """字体索引。
+
+    Parameters
+    ----------
+    path : str
+        索引文件的位置。
+    directories : list of str, optional
+        要索引的字体目录，默认为 :func:`font_directories`。
+    """
+
+    def __init__(self, path=None, directories=None):
+        self.path = path or os.path.join(DEFAULT_CACHE, 'fonts', 'index.pickle')
+        self.directories = directories
+        self._dirs = None    # 目录 -> (mtime_ns, 子目录列表, 字体文件列表)
+        self._fonts = None   # 字体文件路径 -> FontRecord
+        self._best = functools.lru_cache(maxsize=4096)(self._best_uncached)
+
+    @property
+    def fonts(self):
+        self._ensure_loaded()
+        return [r for r in self._fonts.values() if r.family is not None]
+
+    def _ensure_loaded(self):
+        if self._fonts is None:
+            self.refresh()
+
+    def _load(self):
+        """只读取磁盘上的索引文件，不检查字体目录。"""
+        try:
+            with open(self.path, 'rb') as f:
+                data = pickle.load(f)
+            if data.get('version') != _INDEX_VERSION:
+                raise ValueError
+            self._dirs, self._fonts = data['dirs'], data['fonts']
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError,
+                AttributeError, ImportError):
+            self._dirs, self._fonts = {}, {}
+
+    def refresh(self, full=False):
+        """同步索引与字体目录，返回新增或更新的字体数量。
+
+        只有 mtime 发生变化的目录才会重新列出内容；``full=True`` 时还会逐个检查
+        字体文件本身的 mtime 和大小，用于发现被原地替换的字体。索引尚未加载时
+        先读取磁盘上的索引文件。
+        """
+        if self._fonts is None:
+            self._load()
+        roots = self.directories or font_directories()
+        seen_dirs, seen_files = set(), set()
+        changed = 0
+        stack = list(roots)
+        while stack:
+            d = stack.pop()
+            if d in seen_dirs:
+                continue
+            try:
+                mtime = os.stat(d).st_mtime_ns
+            except OSError:
+                continue
+            seen_dirs.add(d)
+            cached = self._dirs.get(d)
+            if cached is None or cached[0] != mtime:
+                subdirs, files = [], []
+                try:
+                    entries = list(os.scandir(d))
+                except OSError:
+                    continue
+                for e in entries:
+                    if e.is_dir():
+                        subdirs.append(e.path)
+                    elif e.name.lower().endswith(_FONT_EXTENSIONS):
+                        files.append(e.path)
+                self._dirs[d] = cached = (mtime, subdirs, files)
+                check_files = True
+            else:
+                check_files = full
+            stack.extend(cached[1])
+            for path in cached[2]:
+                seen_files.add(path)
+                if path in self._fonts and not check_files:
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                old = self._fonts.get(path)
+                if old is not None and ((old.mtime_ns, old.size)
+                                        == (st.st_mtime_ns, st.st_size)):
+                    continue
+                self._fonts[path] = read_font(path, st)
+                changed += 1
+
+        removed = [p for p in self._fonts if p not in seen_files]
+        for p in removed:
+            del self._fonts[p]
+        for d in [d for d in self._dirs if d not in seen_dirs]:
+            del self._dirs[d]
+        if changed or removed:
+            self._best.cache_clear()
+            self.save()
+        return changed
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path))
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump({'version': _INDEX_VERSION, 'dirs': self._dirs,
+                         'fonts': self._fonts}, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+
+    def covering(self, text):
+        """能完整显示 ``text`` 中所有字符（空白除外）的字体。"""
+        need = tuple(sorted(coverage_blocks(
+            ord(c) for c in text if not c.isspace()).items()))
+        return [r for r in self.fonts if _covers(r.blocks, need)]
+
+    def best_font(self, text, family=None, style='normal', weight='normal'):
+        """能完整显示 ``text`` 的最佳字体，没有时返回 None。
+
+        ``family`` 为按优先级排列的字族名（可包含 ``'sans-serif'`` 等通用字族，
+        按 rcParams 展开），缺省时为 ``rcParams['font.family']``；字族相同时
+        依次比较样式和字重。
+        """
+        if family is None:
+            family = rcParams['font.family']
+        if isinstance(family, str):
+            family = [family]
+        # 以展开后的字族作为缓存键，修改 rcParams['font.sans-serif'] 等之后不会命中旧结果
+        return self._best(text, tuple(_expand_families(family)), style,
+                          _weight_value(weight))
+
+    def _best_uncached(self, text, families, style, weight):
+        # 进程内缓存未命中时重新检查字体目录的 mtime，运行期间新安装的字体也能被找到；
+        # 有变化时 refresh 会清空进程内缓存
+        self.refresh()
+        need = tuple(sorted(coverage_blocks(
+            ord(c) for c in text if not c.isspace()).items()))
+        ranks = {}
+        for name in families:
+            ranks.setdefault(name.lower(), len(ranks))
+        best, best_score = None, None
+        for r in self._fonts.values():
+            if r.family is None or not _covers(r.blocks, need):
+                continue
+            score = (ranks.get(r.family.lower(), len(ranks)),
+                     r.style != style, abs(r.weight - weight), r.path)
+            if best_score is None or score < best_score:
+                best, best_score = r, score
+        return best
+
+
+def _covers(blocks, need):
+    for block, mask in need:
+        if blocks.get(block, 0) & mask != mask:
+            return False
+    return True
+
+
+def _expand_families(family):
+    names = []
+    for name in family:
+        if name in _GENERIC_FAMILIES:
+            names.extend(rcParams['font.' + name])
+        else:
+            names.append(name)
+    return names
+
+
+_index = None
+
+
+def get_index():
+    """进程内共享的字体索引，第一次查询时才从磁盘加载。"""
+    global _index
+    if _index is None:
+        _index = FontIndex()
+    return _index
+
+
+def best_font(text, family=None, style='normal', weight='normal'):
+    return get_index().best_font(text, family, style, weight)
+
+
+def font_properties(text, family=None, style='normal', weight='normal',
+                    size=None):
+    """返回能显示 ``text`` 的 ``FontProperties``，直接指定字体文件路径。
+
+    没有找到覆盖全部字符的字体时，退回到按 ``family`` 查找的默认行为。
+    """
+    record = best_font(text, family, style, weight)
+    if record is None:
+        return font_manager.FontProperties(family=family, style=style,
+                                           weight=weight, size=size)
+    return font_manager.FontProperties(fname=record.path, size=size)
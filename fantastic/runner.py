@@ -0,0 +1,429 @@
+"""并行、带缓存的章节执行器。
+
+把各章节的代码按单元格（cell）拆开，在进程池中以 Agg 后端执行，并把每个
+单元格生成的图片保存下来。每个单元格有一个缓存键，由以下内容共同决定：
+
+- 该单元格之前所有单元格的缓存键（单元格之间共享变量，前面改了后面也要重跑）；
+- 该单元格的源码；
+- 初始 rcParams、matplotlib/numpy 版本；
+- 单元格中以字符串形式引用到的仓库内文件（如 ``data/*.csv``、``file/*.mplstyle``）的内容。
+
+缓存命中的单元格直接复制已有的 PNG/SVG，未命中的单元格被切分成若干段
+分发到各个进程：每个进程先静默重放该段之前的单元格以恢复变量状态（不保存图片），
+再执行并渲染该段。因此只改动一个单元格时，只有它及其后续单元格需要重新绘图。
+
+用法::
+
+    python -m fantastic.runner                       # 执行仓库根目录下的五个 notebook
+    python -m fantastic.runner build/jupyter_execute/*/index.py --format png svg
+    python -m fantastic.runner --jobs 8 --outdir build/fantastic_execute
+"""
+
+import argparse
+import contextlib
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from ._cache import DEFAULT_CACHE, RAW_URL, ROOT, file_digest
+
+DEFAULT_OUTDIR = os.path.join(ROOT, 'build', 'fantastic_execute')
+
+Cell = namedtuple('Cell', ['index', 'source'])
+CellResult = namedtuple('CellResult',
+                        ['index', 'key', 'files', 'error', 'cached'])
+
+_IN_MARKER = re.compile(r'^# In\[[^\]]*\]:[ \t]*$', re.M)
+_STRING_LITERAL = re.compile(r'''(['"])([^'"\n]+?)\1''')
+
+
+def chapter_name(path):
+    """章节名：notebook 取文件名，build/jupyter_execute 下的脚本取目录名。"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if stem == 'index':
+        return os.path.basename(os.path.dirname(os.path.abspath(path)))
+    return stem
+
+
+def _strip_magics(source):
+    # 去掉 IPython 魔法命令和 shell 命令
+    lines = [line for line in source.splitlines()
+             if not line.lstrip().startswith(('%', '!'))]
+    return '\n'.join(lines).strip('\n')
+
+
+def load_cells(path):
+    """读取一个章节的代码单元格。
+
+    ``.ipynb`` 取所有 code 单元格，``index`` 为单元格在 notebook 中的位置；
+    ``.py`` 按 ``# In[n]:`` 标记切分，``index`` 为代码单元格的序号。
+    """
+    if path.endswith('.ipynb'):
+        with open(path, encoding='utf-8') as f:
+            nb = json.load(f)
+        cells = []
+        for i, cell in enumerate(nb['cells']):
+            if cell['cell_type'] != 'code':
+                continue
+            source = cell['source']
+            if isinstance(source, list):
+                source = ''.join(source)
+            cells.append(Cell(i, _strip_magics(source)))
+        return cells
+
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    parts = _IN_MARKER.split(text)[1:]
+    return [Cell(i, _strip_magics(part)) for i, part in enumerate(parts)]
+
+
+def _digest(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode('utf-8') if isinstance(part, str) else part)
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def dependencies(source, root=ROOT):
+    """找出单元格源码中以字符串字面量引用到的仓库内文件。"""
+    deps = set()
+    for _, literal in _STRING_LITERAL.findall(source):
+        m = RAW_URL.match(literal)
+        rel = m.group(1) if m else literal
+        if '/' not in rel and '.' not in rel:
+            continue
+        path = os.path.normpath(os.path.join(root, rel))
+        inside = os.path.commonpath([path, root]) == root
+        if inside and os.path.isfile(path):
+            deps.add(path)
+    return sorted(deps)
+
+
+def base_fingerprint():
+    """执行环境的指纹：版本号与初始 rcParams。
+
+    不切换调用者的后端；工作进程总是使用 Agg，``backend`` 本身不参与计算。
+    """
+    import matplotlib
+    import numpy
+    # dict.items 不会触发 rcParams['backend'] 的自动解析
+    params = sorted((k, repr(v)) for k, v in dict.items(matplotlib.rcParams)
+                    if k != 'backend')
+    return _digest(sys.version, matplotlib.__version__, numpy.__version__,
+                   repr(params))
+
+
+def cell_keys(cells, base, root=ROOT):
+    """按顺序计算每个单元格的缓存键，前一个单元格的键参与后一个的计算。"""
+    keys = []
+    prev = base
+    for cell in cells:
+        deps = [os.path.relpath(p, root) + ':' + file_digest(p)
+                for p in dependencies(cell.source, root)]
+        prev = _digest(prev, cell.source, *deps)
+        keys.append(prev)
+    return keys
+
+
+class CellCache:
+    """按缓存键存放单元格输出的目录。
+
+    每个条目是 ``<cache_dir>/cells/<key[:2]>/<key>/``，其中有 ``meta.json``
+    （图片数量和标准输出）以及 ``<k>.<fmt>`` 图片文件。
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE):
+        self.root = os.path.join(cache_dir, 'cells')
+
+    def _entry(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def lookup(self, key, formats):
+        """命中时返回 meta 字典，缺少任何一种格式的图片都视为未命中。"""
+        entry = self._entry(key)
+        try:
+            with open(os.path.join(entry, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        for k in range(meta['nfigs']):
+            for fmt in formats:
+                if not os.path.isfile(os.path.join(entry, f'{k}.{fmt}')):
+                    return None
+        return meta
+
+    def store(self, key, figures, stdout):
+        """写入一个条目。``figures`` 为 ``[{fmt: path}, ...]``。"""
+        entry = self._entry(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=os.path.dirname(entry))
+        for k, paths in enumerate(figures):
+            for fmt, path in paths.items():
+                shutil.copyfile(path, os.path.join(tmp, f'{k}.{fmt}'))
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'nfigs': len(figures), 'stdout': stdout}, f,
+                      ensure_ascii=False)
+        old = None
+        if os.path.isdir(entry):
+            # 同一个键的输出相同，保留已有条目中其他格式的图片
+            for name in os.listdir(entry):
+                if not os.path.exists(os.path.join(tmp, name)):
+                    shutil.copyfile(os.path.join(entry, name),
+                                    os.path.join(tmp, name))
+            # 非空目录不能直接被 os.replace 覆盖，先把旧条目移开
+            old = tmp + '.old'
+            try:
+                os.rename(entry, old)
+            except OSError:
+                old = None
+        try:
+            os.replace(tmp, entry)
+        except OSError:
+            # 其他进程已写入相同的条目
+            shutil.rmtree(tmp, ignore_errors=True)
+        if old is not None:
+            shutil.rmtree(old, ignore_errors=True)
+
+    def restore(self, key, meta, formats, outdir, cell_index):
+        """把条目中的图片复制到输出目录，返回写出的文件列表。"""
+        entry = self._entry(key)
+        _clear_figures(outdir, cell_index)
+        written = []
+        for k in range(meta['nfigs']):
+            for fmt in formats:
+                dst = os.path.join(outdir, f'index_{cell_index}_{k}.{fmt}')
+                shutil.copyfile(os.path.join(entry, f'{k}.{fmt}'), dst)
+                written.append(dst)
+        _write_stdout(outdir, cell_index, meta['stdout'])
+        return written
+
+
+def _clear_figures(outdir, cell_index):
+    """删除上一次运行留下的该单元格的图片，图片数量变少时不会残留旧文件。"""
+    for path in glob.glob(os.path.join(outdir, f'index_{cell_index}_*.*')):
+        os.remove(path)
+
+
+def _write_stdout(outdir, cell_index, stdout):
+    path = os.path.join(outdir, f'index_{cell_index}.txt')
+    if stdout:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(stdout)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+_worker_rc = None
+
+
+def _init_worker(root, cache_dir):
+    global _worker_rc
+    import matplotlib
+    matplotlib.use('Agg')
+    _worker_rc = matplotlib.rcParams.copy()
+    os.chdir(root)
+    # 章节中通过链接引用的样式表改用本地副本
+    from . import styles
+    styles.install(styles.StyleRegistry(cache_dir))
+
+
+def _reset_state():
+    import matplotlib
+    import matplotlib.pyplot as plt
+    plt.close('all')
+    with warnings_suppressed():
+        matplotlib.rcParams.update(_worker_rc)
+
+
+@contextlib.contextmanager
+def warnings_suppressed():
+    import warnings
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        yield
+
+
+def _run_segment(task):
+    """进程池任务：重放 ``[0, start)``，渲染并缓存 ``[start, stop)``。"""
+    import matplotlib.pyplot as plt
+
+    cells, keys, start, stop, outdir, formats, cache_dir, savefig_kw = task
+    cache = CellCache(cache_dir)
+    _reset_state()
+    namespace = {'__name__': '__main__'}
+    results = []
+
+    for cell in cells[:start]:
+        with contextlib.redirect_stdout(io.StringIO()), warnings_suppressed():
+            try:
+                exec(compile(cell.source, f'<cell {cell.index}>', 'exec'),
+                     namespace)
+            except Exception:
+                pass
+        plt.close('all')
+
+    for cell, key in zip(cells[start:stop], keys[start:stop]):
+        buf = io.StringIO()
+        error = None
+        with contextlib.redirect_stdout(buf), warnings_suppressed():
+            try:
+                exec(compile(cell.source, f'<cell {cell.index}>', 'exec'),
+                     namespace)
+            except Exception:
+                error = traceback.format_exc()
+
+        figures = []
+        written = []
+        _clear_figures(outdir, cell.index)
+        for k, num in enumerate(plt.get_fignums()):
+            fig = plt.figure(num)
+            paths = {}
+            for fmt in formats:
+                path = os.path.join(outdir, f'index_{cell.index}_{k}.{fmt}')
+                try:
+                    with warnings_suppressed():
+                        fig.savefig(path, format=fmt, **savefig_kw)
+                except Exception:
+                    # 部分错误（如字体文件不存在）要到绘制时才会抛出
+                    error = error or traceback.format_exc()
+                    continue
+                paths[fmt] = path
+                written.append(path)
+            figures.append(paths)
+        plt.close('all')
+        _write_stdout(outdir, cell.index, buf.getvalue())
+
+        if error is None:
+            cache.store(key, figures, buf.getvalue())
+        results.append(CellResult(cell.index, key, written, error, False))
+    return results
+
+
+def _split_runs(missing, n_chunks):
+    """把未命中的单元格下标切成连续的若干段，段数尽量接近 ``n_chunks``。"""
+    runs = []
+    for i in missing:
+        if runs and runs[-1][1] == i:
+            runs[-1][1] = i + 1
+        else:
+            runs.append([i, i + 1])
+    size = max(1, -(-len(missing) // max(1, n_chunks)))
+    segments = []
+    for start, stop in runs:
+        for s in range(start, stop, size):
+            segments.append((s, min(s + size, stop)))
+    return segments
+
+
+def build(sources, outdir=DEFAULT_OUTDIR, cache_dir=DEFAULT_CACHE,
+          formats=('png',), jobs=None, savefig_kw=None, root=ROOT):
+    """执行若干章节，返回 ``{章节名: [CellResult, ...]}``。"""
+    if savefig_kw is None:
+        savefig_kw = {'bbox_inches': 'tight'}
+    jobs = jobs or os.cpu_count() or 1
+    cache = CellCache(cache_dir)
+    base = _digest(base_fingerprint(), repr(sorted(savefig_kw.items())))
+
+    plans = []
+    report = {}
+    for source in sources:
+        name = chapter_name(source)
+        cells = load_cells(source)
+        keys = cell_keys(cells, base, root)
+        chapter_out = os.path.join(outdir, name)
+        os.makedirs(chapter_out, exist_ok=True)
+        results = report.setdefault(name, [])
+        missing = []
+        for i, (cell, key) in enumerate(zip(cells, keys)):
+            meta = cache.lookup(key, formats)
+            if meta is None:
+                missing.append(i)
+            else:
+                written = cache.restore(key, meta, formats, chapter_out,
+                                        cell.index)
+                results.append(CellResult(cell.index, key, written, None, True))
+        plans.append((name, cells, keys, chapter_out, missing))
+
+    total_missing = sum(len(p[4]) for p in plans)
+    tasks = []
+    for name, cells, keys, chapter_out, missing in plans:
+        if not missing:
+            continue
+        # 按未命中单元格的数量分配进程
+        share = max(1, round(jobs * len(missing) / total_missing))
+        for start, stop in _split_runs(missing, share):
+            tasks.append((name, (cells, keys, start, stop, chapter_out,
+                                 tuple(formats), cache_dir, savefig_kw)))
+
+    if tasks:
+        workers = min(jobs, len(tasks))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(root, cache_dir)) as pool:
+            futures = [(name, pool.submit(_run_segment, task))
+                       for name, task in tasks]
+            for name, future in futures:
+                report[name].extend(future.result())
+
+    for results in report.values():
+        results.sort(key=lambda r: r.index)
+    return report
+
+
+def default_sources(root=ROOT):
+    return sorted(os.path.join(root, f) for f in os.listdir(root)
+                  if f.endswith('.ipynb'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='并行执行章节代码，并复用未改动单元格的图片输出')
+    parser.add_argument('sources', nargs='*',
+                        help='.ipynb 或 index.py 文件，默认为仓库根目录下的 notebook')
+    parser.add_argument('--outdir', default=DEFAULT_OUTDIR)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE)
+    parser.add_argument('--format', nargs='+', default=['png'],
+                        choices=['png', 'svg', 'pdf'])
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='进程数，默认为 CPU 核数')
+    parser.add_argument('--dpi', type=float, default=None)
+    args = parser.parse_args(argv)
+
+    savefig_kw = {'bbox_inches': 'tight'}
+    if args.dpi:
+        savefig_kw['dpi'] = args.dpi
+    sources = [os.path.abspath(s) for s in args.sources] or default_sources()
+
+    t0 = time.perf_counter()
+    report = build(sources, args.outdir, args.cache_dir, args.format,
+                   args.jobs, savefig_kw)
+    failed = False
+    hits = misses = 0
+    for name, results in report.items():
+        for r in results:
+            if r.cached:
+                hits += 1
+            else:
+                misses += 1
+            if r.error is not None:
+                failed = True
+                print(f'{name} cell {r.index} 执行出错:\n{r.error}',
+                      file=sys.stderr)
+    print(f'{len(report)} 个章节，{hits + misses} 个单元格'
+          f'（缓存命中 {hits}，重新执行 {misses}），'
+          f'耗时 {time.perf_counter() - t0:.2f}s')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
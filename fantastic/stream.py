@@ -0,0 +1,316 @@
+"""``Line2D``/``PathCollection`` 的流式实时绘图。
+
+第一回、第二回中更新图形的方式是修改 ``Line2D`` 后重绘整张图，对 50Hz 以上、
+多条曲线的监控面板来说，每帧重算刻度、文字和布局的开销远大于画线本身。这里的做法是：
+
+1. 每条序列使用固定容量的环形缓冲区，追加数据时不重新分配内存，
+   且总能取到按时间顺序排列的连续视图（零拷贝）；
+2. 数据图形设为 ``animated``，完整绘制一次后按坐标轴缓存背景，之后每帧只在有新数据的
+   坐标轴上恢复背景、重绘其中的图形并 ``blit``；
+3. 只有新数据落到当前视图之外时才重新设置坐标轴范围并完整重绘一次，刻度定位器
+   （如第四回的 ``MaxNLocator``、``DayLocator``）也只在这时重新计算；
+4. 可见的数据点多于坐标轴像素列数的四倍时，每个像素列只保留首尾两点和最小值、最大值
+   所在的点（M4 抽稀），折线的轮廓与原始数据一致；线宽会使相邻的列互相覆盖，
+   个别像素可能与直接绘制全部数据时不同。
+
+示例::
+
+    from fantastic.stream import LivePlot
+
+    fig, ax = plt.subplots()
+    ax.xaxis.set_major_locator(MaxNLocator(nbins=6))
+    live = LivePlot(fig, window=10)
+    sensor = live.line(ax, capacity=100000, lw=1)
+    plt.show(block=False)
+    while True:
+        sensor.append(t, read_sensor())
+        live.update()
+"""
+
+import math
+import time
+
+import matplotlib.dates as mdates
+import numpy as np
+
+
+class RingBuffer:
+    """固定容量的一维环形缓冲区。
+
+    数据同时写入长度为 ``2 * capacity`` 的数组的前后两半，因此最近 ``capacity``
+    个元素总是一段连续内存，:meth:`view` 不需要拷贝。
+    """
+
+    def __init__(self, capacity, dtype=float):
+        self.capacity = int(capacity)
+        self._data = np.full(2 * self.capacity, np.nan, dtype=dtype)
+        self._end = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._data.dtype).ravel()
+        cap = self.capacity
+        if len(values) > cap:
+            values = values[-cap:]
+        n = len(values)
+        i = self._end
+        head = min(n, cap - i)
+        self._data[i:i + head] = values[:head]
+        self._data[cap + i:cap + i + head] = values[:head]
+        rest = n - head
+        if rest:
+            self._data[:rest] = values[head:]
+            self._data[cap:cap + rest] = values[head:]
+        self._end = (i + n) % cap
+        self._size = min(self._size + n, cap)
+
+    def view(self):
+        """按写入顺序排列的只读视图。"""
+        stop = self._end + self.capacity
+        out = self._data[stop - self._size:stop]
+        out.flags.writeable = False
+        return out
+
+    def clear(self):
+        self._end = self._size = 0
+
+
+def minmax_decimate(x, y, lo, hi, columns):
+    """把 ``[lo, hi]`` 内按 ``x`` 升序排列的折线数据抽稀到每个像素列至多四个点。
+
+    每列保留第一个点、最后一个点以及最小值和最大值所在的点（M4 抽稀），四者按原来的
+    先后顺序排列，每列的纵向范围和列与列之间的连线都与原始数据相同；有线宽的折线会越过
+    列的边界，因此不保证逐像素相同。视图两侧各保留一个相邻的点，使折线延伸到坐标轴边缘。数据点不超过 ``4 * columns`` 时原样返回可见部分。
+    """
+    i0 = np.searchsorted(x, lo, 'left')
+    i1 = np.searchsorted(x, hi, 'right')
+    j0, j1 = max(i0 - 1, 0), min(i1 + 1, len(x))
+    if i1 - i0 <= 4 * columns:
+        return x[j0:j1], y[j0:j1]
+    xs, ys = x[i0:i1], y[i0:i1]
+    edges = np.linspace(lo, hi, columns + 1)[:-1]
+    starts = np.unique(np.searchsorted(xs, edges))
+    starts = starts[starts < len(xs)]
+    stops = np.append(starts[1:], len(xs))
+    group = np.repeat(np.arange(len(starts)), stops - starts)
+    imin = _first_in_group(ys == np.fmin.reduceat(ys, starts)[group],
+                           starts, stops)
+    imax = _first_in_group(ys == np.fmax.reduceat(ys, starts)[group],
+                           starts, stops)
+    idx = np.column_stack([starts, imin, imax, stops - 1])
+    idx.sort(axis=1)
+    idx = idx.ravel()
+    idx = idx[np.r_[True, idx[1:] != idx[:-1]]]
+    out_x = np.concatenate([x[j0:i0], xs[idx], x[i1:j1]])
+    out_y = np.concatenate([y[j0:i0], ys[idx], y[i1:j1]])
+    return out_x, out_y
+
+
+def _first_in_group(mask, starts, stops):
+    # 每组 [starts[k], stops[k]) 中第一个为 True 的下标，没有时（整列都是 NaN）取组首
+    hits = np.flatnonzero(mask)
+    if not len(hits):
+        return starts
+    pos = np.minimum(np.searchsorted(hits, starts), len(hits) - 1)
+    first = hits[pos]
+    return np.where(first < stops, first, starts)
+
+
+def _as_float(x):
+    x = np.atleast_1d(np.asarray(x))
+    if x.dtype.kind in 'MO':
+        # datetime64 和 datetime 对象统一转换为 Matplotlib 的日期数值
+        return np.asarray(mdates.date2num(x), dtype=float)
+    return x.astype(float, copy=False)
+
+
+class Series:
+    """一条流式序列：一个图形加上 x、y 两个环形缓冲区。"""
+
+    def __init__(self, artist, capacity):
+        self.artist = artist
+        self.axes = artist.axes
+        self.x = RingBuffer(capacity)
+        self.y = RingBuffer(capacity)
+        self.monotonic = True
+        self.dirty = False
+        self._pending = None
+
+    def __len__(self):
+        return len(self.x)
+
+    def append(self, x, y):
+        """追加一个或多个样本，``x`` 可以是数值、``datetime`` 或 ``datetime64``。"""
+        x, y = _as_float(x), np.atleast_1d(np.asarray(y, dtype=float))
+        x, y = np.broadcast_arrays(x, y)
+        if not len(x):
+            return
+        if self.monotonic and len(self.x):
+            self.monotonic = x[0] >= self.x.view()[-1]
+        if self.monotonic and len(x) > 1:
+            self.monotonic = bool(np.all(np.diff(x) >= 0))
+        self.x.extend(x)
+        self.y.extend(y)
+        bounds = (np.nanmin(x), np.nanmax(x), np.nanmin(y), np.nanmax(y))
+        if self._pending is None:
+            self._pending = bounds
+        else:
+            p = self._pending
+            self._pending = (min(p[0], bounds[0]), max(p[1], bounds[1]),
+                             min(p[2], bounds[2]), max(p[3], bounds[3]))
+        self.dirty = True
+
+    def clear(self):
+        self.x.clear()
+        self.y.clear()
+        self.monotonic = True
+        self.dirty = True
+
+    def leaves_view(self):
+        """自上次绘制以来追加的数据是否有落在当前视图之外的。"""
+        if self._pending is None:
+            return False
+        xmin, xmax, ymin, ymax = self._pending
+        (x0, x1), (y0, y1) = (sorted(self.axes.get_xlim()),
+                              sorted(self.axes.get_ylim()))
+        return xmin < x0 or xmax > x1 or ymin < y0 or ymax > y1
+
+    def _pixel_columns(self):
+        """与设备像素列对齐的 ``(lo, hi, 列数)``。"""
+        x0, x1 = self.axes.bbox.intervalx
+        px0, px1 = math.floor(x0), math.ceil(x1)
+        inv = self.axes.transData.inverted()
+        lo, hi = sorted(inv.transform([(px0, 0), (px1, 0)])[:, 0])
+        return lo, hi, max(px1 - px0, 1)
+
+    def push(self):
+        """把缓冲区中的数据交给图形，折线在数据点多于像素列时做抽稀。"""
+        x, y = self.x.view(), self.y.view()
+        if hasattr(self.artist, 'set_offsets'):
+            self.artist.set_offsets(np.column_stack([x, y]))
+        else:
+            if self.monotonic:
+                x, y = minmax_decimate(x, y, *self._pixel_columns())
+            self.artist.set_data(x, y)
+        self.dirty = False
+        self._pending = None
+
+
+class LivePlot:
+    """管理一张图中所有流式序列的重绘。
+
+    Parameters
+    ----------
+    figure : Figure
+        已经创建好坐标轴的图形。
+    window : float, optional
+        x 轴只显示最近 ``window`` 个单位（日期坐标轴中单位为天）的数据；
+        缺省时显示缓冲区中的全部数据。
+    headroom : float
+        重新设置坐标轴范围时额外留出的比例，数据越过视图后的若干帧内不必再次完整重绘。
+    """
+
+    def __init__(self, figure, window=None, headroom=0.1):
+        self.figure = figure
+        self.canvas = figure.canvas
+        self.window = window
+        self.headroom = headroom
+        self.series = []
+        self.stats = {'frames': 0, 'full_redraws': 0, 'frame_time': 0.0}
+        self._backgrounds = {}
+        self._cid = self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _add(self, artist, capacity):
+        artist.set_animated(True)
+        series = Series(artist, capacity)
+        self.series.append(series)
+        return series
+
+    def line(self, ax, capacity=10000, **kwargs):
+        """在 ``ax`` 中添加一条流式折线，``kwargs`` 传给 ``ax.plot``。"""
+        line, = ax.plot([], [], **kwargs)
+        return self._add(line, capacity)
+
+    def scatter(self, ax, capacity=10000, **kwargs):
+        """在 ``ax`` 中添加一组流式散点，只保留最近 ``capacity`` 个点。"""
+        return self._add(ax.scatter(np.empty(0), np.empty(0), **kwargs),
+                         capacity)
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self._cid)
+        for s in self.series:
+            s.artist.set_animated(False)
+
+    def _on_draw(self, event):
+        # 完整重绘（包括窗口缩放、交互式平移）之后重新缓存背景
+        self._backgrounds = {}
+        for ax in {s.axes for s in self.series}:
+            # 多取一个像素，覆盖图形在坐标轴边缘被裁剪时半透明的那一行
+            self._backgrounds[ax] = self.canvas.copy_from_bbox(
+                ax.bbox.padded(1))
+        for s in self.series:
+            s.push()
+            s.axes.draw_artist(s.artist)
+
+    def _rescale(self, ax):
+        series = [s for s in self.series if s.axes is ax and len(s)]
+        if not series:
+            return
+        pending = [s._pending for s in series if s._pending is not None]
+        (x0, x1), (y0, y1) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+        if not any(p[0] < x0 or p[1] > x1 for p in pending):
+            # 只有 y 越界时在当前视图的基础上扩大 y 轴范围，不缩小
+            ymin = min([y0] + [p[2] for p in pending])
+            ymax = max([y1] + [p[3] for p in pending])
+            pad = (ymax - ymin) * self.headroom
+            ax.set_ylim(ymin - pad if ymin < y0 else y0,
+                        ymax + pad if ymax > y1 else y1)
+            return
+
+        xs = [s.x.view() for s in series]
+        xmax = max(np.nanmax(x) for x in xs)
+        if self.window is not None:
+            lo, hi = xmax - self.window, xmax + self.window * self.headroom
+        else:
+            xmin = min(np.nanmin(x) for x in xs)
+            span = (xmax - xmin) or 1
+            lo, hi = xmin, xmax + span * self.headroom
+        ys = np.concatenate([s.y.view()[(x >= lo) & (x <= hi)]
+                             for s, x in zip(series, xs)])
+        ax.set_xlim(lo, hi)
+        if len(ys) and np.isfinite(ys).any():
+            ymin, ymax = np.nanmin(ys), np.nanmax(ys)
+            pad = (ymax - ymin) * self.headroom or 1
+            ax.set_ylim(ymin - pad, ymax + pad)
+
+    def update(self):
+        """重绘有新数据的序列，返回本帧是否做了完整重绘。"""
+        t0 = time.perf_counter()
+        dirty = [s for s in self.series if s.dirty]
+        rescale = {s.axes for s in dirty if s.leaves_view()}
+        for ax in rescale:
+            self._rescale(ax)
+
+        # 上次完整重绘之后才添加序列的坐标轴还没有缓存背景
+        full = (bool(rescale) or not self._backgrounds
+                or any(s.axes not in self._backgrounds for s in dirty))
+        if full:
+            self.canvas.draw()
+            self.stats['full_redraws'] += 1
+        else:
+            for ax in {s.axes for s in dirty}:
+                # 同一坐标轴中的图形可能重叠，恢复背景后全部重画
+                self.canvas.restore_region(self._backgrounds[ax])
+                for s in self.series:
+                    if s.axes is ax:
+                        if s.dirty:
+                            s.push()
+                        ax.draw_artist(s.artist)
+                self.canvas.blit(ax.bbox.padded(1))
+        self.canvas.flush_events()
+        self.stats['frames'] += 1
+        self.stats['frame_time'] = time.perf_counter() - t0
+        return full
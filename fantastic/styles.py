@@ -0,0 +1,235 @@
+"""离线、预编译的样式表注册中心。
+
+第五回中 ``plt.style.use`` 直接传入 GitHub 上的样式表链接，并且和
+``dark_background`` 叠加使用。每次启动进程都要联网下载、重新解析，在无法联网的
+渲染节点上会直接失败。这里的做法是：
+
+- 内置样式和仓库中的 ``file/*.mplstyle`` 预先登记，后者可以用文件名（如
+  ``'presentation'``）引用；
+- 指向本仓库的链接（``.../main/file/presentation.mplstyle``）直接映射到本地文件，
+  其他链接只在第一次使用时下载，之后使用缓存的副本；
+- 叠加的样式列表被展开成一个 rcParams 字典，按各组成部分的内容哈希保存在磁盘上，
+  再次使用时只需读取缓存并执行一次 ``rcParams.update``。
+
+示例::
+
+    from fantastic import styles
+
+    styles.use(['dark_background',
+                'https://raw.githubusercontent.com/datawhalechina/'
+                'fantastic-matplotlib/main/file/presentation.mplstyle'])
+
+    # 或者替换 matplotlib.style.use，让已有代码不做修改即可离线运行
+    styles.install()
+"""
+
+import contextlib
+import glob
+import hashlib
+import os
+import pickle
+import tempfile
+import urllib.request
+from pathlib import Path
+
+import matplotlib as mpl
+import matplotlib.style as mstyle
+
+from ._cache import DEFAULT_CACHE, RAW_URL, ROOT
+
+try:
+    from matplotlib.style import _STYLE_BLACKLIST as STYLE_BLACKLIST
+except ImportError:  # matplotlib < 3.11
+    from matplotlib.style.core import STYLE_BLACKLIST
+
+_STYLE_ALIAS = {'mpl20': 'default', 'mpl15': 'classic'}
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _filter(params):
+    return {k: v for k, v in dict.items(params) if k not in STYLE_BLACKLIST}
+
+
+class StyleRegistry:
+    """样式注册中心。
+
+    Parameters
+    ----------
+    cache_dir : str
+        缓存目录，展开后的样式保存在 ``<cache_dir>/styles`` 下，
+        下载的样式表保存在 ``<cache_dir>/styles/urls`` 下。
+    offline : bool, optional
+        为 True 时不联网，未缓存的链接直接报错；缺省时由环境变量
+        ``FANTASTIC_OFFLINE`` 决定（非空且不为 ``'0'`` 时离线）。
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE, offline=None):
+        self.cache_dir = os.path.join(cache_dir, 'styles')
+        if offline is None:
+            offline = os.environ.get('FANTASTIC_OFFLINE', '') not in ('', '0')
+        self.offline = offline
+        self._files = {}      # 样式名或链接 -> 本地样式表路径
+        self._resolved = {}   # 样式说明 -> 展开后的 rcParams 字典
+        for path in glob.glob(os.path.join(ROOT, 'file', '*.mplstyle')):
+            self.register(Path(path).stem, path)
+
+    def register(self, name, path):
+        """把样式名或链接登记为一个本地样式表文件。"""
+        self._files[name] = os.path.abspath(path)
+        self._resolved.clear()
+
+    @property
+    def available(self):
+        return sorted(set(mstyle.library) | set(self._files) | {'default'})
+
+    def _url_file(self, url):
+        m = RAW_URL.match(url)
+        if m:
+            local = os.path.join(ROOT, m.group(1))
+            if os.path.isfile(local):
+                return local
+        path = os.path.join(self.cache_dir, 'urls',
+                            _digest(url.encode('utf-8')) + '.mplstyle')
+        if os.path.isfile(path):
+            return path
+        if self.offline:
+            raise OSError(f'样式表 {url!r} 没有本地缓存，且当前为离线模式')
+        with urllib.request.urlopen(url, timeout=30) as resp:
+            data = resp.read()
+        _atomic_write(path, data)
+        return path
+
+    def _component(self, style):
+        """返回 ``(内容哈希, 加载函数)``，加载函数返回该样式的 rcParams 字典。"""
+        if isinstance(style, Path):
+            style = str(style)
+        if isinstance(style, str):
+            style = _STYLE_ALIAS.get(style, style)
+            if style == 'default':
+                return ('default:' + mpl.__version__,
+                        lambda: _filter(mpl.rcParamsDefault))
+            if style in self._files:
+                path = self._files[style]
+            elif style in mstyle.library:
+                params = mstyle.library[style]
+                text = repr(sorted((k, repr(v))
+                                   for k, v in dict.items(params)))
+                return ('library:' + _digest(text.encode('utf-8')),
+                        lambda: _filter(params))
+            elif '://' in style:
+                path = self._url_file(style)
+            else:
+                path = style
+            with open(path, 'rb') as f:
+                key = 'file:' + _digest(f.read())
+            return key, lambda: _filter(
+                mpl.rc_params_from_file(path, use_default_template=False))
+        if hasattr(style, 'keys'):
+            params = _filter(style)
+            text = repr(sorted((k, repr(v)) for k, v in params.items()))
+            return 'dict:' + _digest(text.encode('utf-8')), lambda: params
+        raise TypeError(f'无法识别的样式说明: {style!r}')
+
+    def resolve(self, style):
+        """把样式说明展开为一个 rcParams 字典，右侧的样式覆盖左侧的同名参数。"""
+        styles = _as_list(style)
+        memo_key = _memo_key(styles)
+        if memo_key is not None and memo_key in self._resolved:
+            return self._resolved[memo_key]
+
+        components = [self._component(s) for s in styles]
+        # 展开结果由当前版本的 matplotlib 校验过，升级后重新展开
+        parts = [mpl.__version__] + [k for k, _ in components]
+        key = _digest('\0'.join(parts).encode('utf-8'))
+        path = os.path.join(self.cache_dir, key + '.pickle')
+        try:
+            with open(path, 'rb') as f:
+                flat = pickle.load(f)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError,
+                AttributeError, ImportError):
+            flat = {}
+            for _, load in components:
+                flat.update(load())
+            _atomic_write(path, pickle.dumps(flat, pickle.HIGHEST_PROTOCOL))
+        if memo_key is not None:
+            self._resolved[memo_key] = flat
+        return flat
+
+    def use(self, style):
+        """与 ``matplotlib.style.use`` 相同，但使用展开后的缓存。"""
+        mpl.rcParams.update(self.resolve(style))
+
+    @contextlib.contextmanager
+    def context(self, style, after_reset=False):
+        """与 ``matplotlib.style.context`` 相同。"""
+        with mpl.rc_context():
+            if after_reset:
+                mpl.rcdefaults()
+            self.use(style)
+            yield
+
+
+def _as_list(style):
+    if isinstance(style, (str, Path)) or hasattr(style, 'keys'):
+        return [style]
+    return list(style)
+
+
+def _memo_key(styles):
+    # 样式名和链接在进程内缓存；文件路径和字典每次都按内容重新计算哈希
+    for s in styles:
+        if not isinstance(s, str) or (os.sep in s and '://' not in s):
+            return None
+    return tuple(styles)
+
+
+def _atomic_write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+_registry = None
+_original_use = None
+
+
+def get_registry():
+    """进程内共享的注册中心。"""
+    global _registry
+    if _registry is None:
+        _registry = StyleRegistry()
+    return _registry
+
+
+def use(style):
+    get_registry().use(style)
+
+
+def context(style, after_reset=False):
+    return get_registry().context(style, after_reset)
+
+
+def install(registry=None):
+    """用本模块的 :func:`use` 替换 ``matplotlib.style.use``（即 ``plt.style.use``）。
+
+    给出 ``registry`` 时以它作为 :func:`get_registry` 返回的注册中心。
+    """
+    global _original_use, _registry
+    if registry is not None:
+        _registry = registry
+    if _original_use is None:
+        _original_use = mstyle.use
+        mstyle.use = use
+
+
+def uninstall():
+    """恢复 ``matplotlib.style.use``。"""
+    global _original_use
+    if _original_use is not None:
+        mstyle.use = _original_use
+        _original_use = None
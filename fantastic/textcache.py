@@ -0,0 +1,401 @@
+"""进程级的文字排版与字形位图缓存。
+
+第四回大量使用 ``ax.text``、``annotate``、``figtext``、自定义 ``FontProperties``
+的图例以及 ``r'$\\sum_{i=0}^\\infty x_i$'`` 这样的数学公式，第三回在设置标题后调用
+``fig.tight_layout()``。Matplotlib 自带的文字尺寸缓存挂在渲染器上，每张新图、每次
+``savefig`` 都会换一个渲染器，同样的刻度标签和公式在报表中被重复测量和光栅化成千上万次。
+这里把四类结果放进进程级的 LRU 缓存，各图形共享：
+
+- 文字尺寸：``(渲染器类型, 文字, 字体属性, 是否公式, dpi)``；
+- 文字排版（``Text._get_layout``）：另加旋转角度、旋转模式、对齐方式和行距；
+- 数学公式的解析与排版结果；
+- Agg 后端的字形位图：``(字体文件, 字号, dpi, 字形, 旋转角度, 1/64 像素偏移)``。
+
+渲染器类型取 ``MixedModeRenderer`` 包装的实际渲染器，SVG、PDF 和 PS 的结果互不混用。
+所有键都包含影响字体查找和排版的 rcParams（``font.*``、``mathtext.*``、字体微调、
+PDF/PS 的核心字体和 AFM 设置等）以及已登记字体文件的摘要，安装新字体、
+修改这些参数后不会命中旧的结果。字形位图按字节数限制大小，其余按条目数限制。
+文字尺寸、排版和字形位图可以保存到磁盘，供下次运行使用；公式的解析结果引用了
+``FT2Font`` 对象，只在进程内缓存。
+
+示例::
+
+    from fantastic import textcache
+
+    textcache.install(persist=True)   # 从磁盘加载，进程退出时保存
+    ...                               # 正常作图
+    print(textcache.get_cache().stats())
+"""
+
+import atexit
+import hashlib
+import math
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+
+import matplotlib
+import numpy as np
+from matplotlib import font_manager, ft2font, rcParams
+from matplotlib import mathtext as mmathtext
+from matplotlib import text as mtext
+from matplotlib.backends.backend_mixed import MixedModeRenderer
+
+from ._cache import DEFAULT_CACHE
+
+try:
+    from matplotlib.backends import backend_agg
+except ImportError:  # pragma: no cover
+    backend_agg = None
+
+_CACHE_VERSION = 2
+_RC_PREFIXES = ('font.', 'mathtext.')
+_RC_EXTRA = ('text.hinting', 'text.hinting_factor', 'text.kerning_factor',
+             'text.usetex', 'text.latex.preamble', 'pdf.use14corefonts',
+             'ps.useafm', 'ps.fonttype')
+_RC_KEYS = tuple(sorted(k for k in rcParams
+                        if k.startswith(_RC_PREFIXES) or k in _RC_EXTRA))
+
+
+def _hashable(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+def fonts_key(_memo={}):
+    """已登记字体的摘要：``fontManager.ttflist`` 中各字体文件的路径和 mtime。
+
+    字族名要到查找时才解析为字体文件，安装新字体或调用 ``fontManager.addfont``
+    之后同样的字族名可能对应另一个文件，这时摘要随之改变。
+    """
+    fm = font_manager.fontManager
+    # ttflist 只会整体替换（重建字体列表）或追加（addfont），据此判断是否需要重算
+    token = (id(fm), id(fm.ttflist), len(fm.ttflist))
+    if _memo.get('token') != token:
+        h = hashlib.sha256()
+        for fname in sorted({os.fspath(e.fname) for e in fm.ttflist}):
+            try:
+                mtime = os.stat(fname).st_mtime_ns
+            except OSError:
+                mtime = -1
+            h.update(f'{fname}\0{mtime}\0'.encode('utf-8', 'surrogateescape'))
+        _memo['token'], _memo['digest'] = token, h.hexdigest()[:16]
+    return _memo['digest']
+
+
+def rc_key():
+    """影响字体查找和排版的 rcParams 的当前取值，另加 :func:`fonts_key`。"""
+    # 绕过 RcParams.__getitem__ 的校验逻辑，每次排版都要调用
+    return (*(_hashable(dict.__getitem__(rcParams, k)) for k in _RC_KEYS),
+            fonts_key())
+
+
+def font_key(prop):
+    """``FontProperties`` 的可哈希、可序列化的键（与其 ``__hash__`` 使用的属性相同）。"""
+    if prop is None:
+        return None
+    fname = prop.get_file()
+    return (tuple(prop.get_family()), prop.get_style(), prop.get_variant(),
+            prop.get_weight(), prop.get_stretch(), prop.get_size_in_points(),
+            os.fspath(fname) if fname is not None else None,
+            prop.get_math_fontfamily())
+
+
+class LRUCache:
+    """带命中统计的 LRU 缓存。
+
+    Parameters
+    ----------
+    maxsize : int
+        容量上限；给出 ``sizeof`` 时为各条目大小之和的上限，否则为条目数。
+    sizeof : callable, optional
+        计算条目大小的函数。
+    """
+
+    def __init__(self, maxsize, sizeof=None):
+        self.maxsize = maxsize
+        self.sizeof = sizeof
+        self.hits = self.misses = 0
+        self.size = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if key in self._data:
+            self.size -= self._size_of(self._data.pop(key))
+        self._data[key] = value
+        self.size += self._size_of(value)
+        while self.size > self.maxsize and self._data:
+            _, old = self._data.popitem(last=False)
+            self.size -= self._size_of(old)
+
+    def _size_of(self, value):
+        return self.sizeof(value) if self.sizeof else 1
+
+    def items(self):
+        """按从旧到新的顺序返回全部条目。"""
+        return list(self._data.items())
+
+    def clear(self):
+        self._data.clear()
+        self.size = 0
+        self.hits = self.misses = 0
+
+    def info(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self._data), 'size': self.size,
+                'maxsize': self.maxsize}
+
+
+def _glyph_nbytes(value):
+    return value[0].nbytes + 64
+
+
+class TextCache:
+    """文字尺寸、排版、公式和字形位图四个 LRU 缓存。
+
+    Parameters
+    ----------
+    max_entries : int
+        文字尺寸和排版缓存的条目数上限。
+    max_mathtext : int
+        公式解析结果的条目数上限。
+    max_glyph_bytes : int
+        字形位图缓存的字节数上限。
+    path : str, optional
+        持久化文件的位置，默认为 ``.fantastic_cache/text/cache.pickle``。
+    """
+
+    _PERSISTENT = ('metrics', 'layouts', 'glyphs')
+
+    def __init__(self, max_entries=100000, max_mathtext=4096,
+                 max_glyph_bytes=64 << 20, path=None):
+        self.path = path or os.path.join(DEFAULT_CACHE, 'text', 'cache.pickle')
+        self.metrics = LRUCache(max_entries)
+        self.layouts = LRUCache(max_entries)
+        self.mathtext = LRUCache(max_mathtext)
+        self.glyphs = LRUCache(max_glyph_bytes, sizeof=_glyph_nbytes)
+
+    def _caches(self):
+        return {'metrics': self.metrics, 'layouts': self.layouts,
+                'mathtext': self.mathtext, 'glyphs': self.glyphs}
+
+    def stats(self):
+        """各缓存的命中次数、未命中次数、命中率和大小。"""
+        return {name: cache.info() for name, cache in self._caches().items()}
+
+    def clear(self):
+        for cache in self._caches().values():
+            cache.clear()
+
+    @staticmethod
+    def _fingerprint():
+        return {'version': _CACHE_VERSION,
+                'matplotlib': matplotlib.__version__,
+                'freetype': ft2font.__freetype_version__,
+                'fonts': fonts_key()}
+
+    def save(self, path=None):
+        """把可持久化的缓存写入磁盘，返回写入的条目数。"""
+        path = path or self.path
+        data = dict(self._fingerprint())
+        caches = self._caches()
+        for name in self._PERSISTENT:
+            data[name] = caches[name].items()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return sum(len(data[name]) for name in self._PERSISTENT)
+
+    def load(self, path=None):
+        """从磁盘加载缓存，文件不存在或版本不符时忽略，返回加载的条目数。"""
+        path = path or self.path
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError,
+                AttributeError, ImportError):
+            return 0
+        if any(data.get(k) != v for k, v in self._fingerprint().items()):
+            return 0
+        caches = self._caches()
+        n = 0
+        for name in self._PERSISTENT:
+            for key, value in data.get(name, ()):
+                if key not in caches[name]:
+                    caches[name].put(key, value)
+                    n += 1
+        return n
+
+
+_cache = None
+_originals = {}
+_atexit_save = None
+
+
+def get_cache():
+    """进程内共享的 :class:`TextCache`。"""
+    global _cache
+    if _cache is None:
+        _cache = TextCache()
+    return _cache
+
+
+def _renderer_key(renderer):
+    """``(渲染器类型, dpi)``，矢量后端的渲染器都包装在 ``MixedModeRenderer`` 中。"""
+    dpi = getattr(renderer, 'dpi', None)
+    if isinstance(renderer, MixedModeRenderer):
+        renderer = renderer._renderer
+    return type(renderer).__name__, dpi
+
+
+def _text_metrics(renderer, text, fontprop, ismath, dpi):
+    key = (*_renderer_key(renderer), text, font_key(fontprop), ismath, dpi,
+           rc_key())
+    value = _cache.metrics.get(key)
+    if value is None:
+        value = _originals['metrics'](renderer, text, fontprop, ismath, dpi)
+        _cache.metrics.put(key, value)
+    return value
+
+
+def _text_layout(self, renderer):
+    if self.get_wrap():
+        # 自动换行的结果取决于文字在图中的位置
+        return _originals['layout'](self, renderer)
+    key = (*_renderer_key(renderer), self.figure.dpi, self.get_text(),
+           font_key(self._fontproperties), self.get_rotation(), self.get_rotation_mode(),
+           self._horizontalalignment, self._verticalalignment,
+           getattr(self, '_multialignment', None), self._linespacing,
+           self.get_usetex(), self.get_parse_math(), rc_key())
+    value = _cache.layouts.get(key)
+    if value is None:
+        value = _originals['layout'](self, renderer)
+        _cache.layouts.put(key, value)
+    # 返回副本，调用者拿到的 Bbox 不会改动缓存中的结果
+    bbox, info, *rest = value
+    return (bbox.frozen(), list(info), *rest)
+
+
+def _parse_mathtext(self, s, dpi, prop, *args):
+    key = (self._output_type, s, dpi, font_key(prop), args, rc_key())
+    value = _cache.mathtext.get(key)
+    if value is None:
+        value = _originals['mathtext'](self, s, dpi, prop, *args)
+        _cache.mathtext.put(key, value)
+    return value
+
+
+def _draw_glyphs(self, gc, x, y, angle, glyphs, boxes):
+    # 与 RendererAgg._draw_text_glyphs_and_boxes 相同，只是字形位图按
+    # 1/64 像素内的偏移缓存，整像素的平移在贴图时加回去
+    cos = math.cos(math.radians(angle))
+    sin = math.sin(math.radians(angle))
+    load_flags = backend_agg.get_hinting_flag()
+    antialiased = gc.get_antialiased()
+    hinting_factor = dict.__getitem__(rcParams, 'text.hinting_factor')
+    height = self.height
+    for font, size, glyph_index, slant, extend, dx, dy in glyphs:
+        px = round(0x40 * (x + dx * cos - dy * sin))
+        py = round(0x40 * (height - y + dx * sin + dy * cos))
+        (ix, fx), (iy, fy) = divmod(px, 0x40), divmod(py, 0x40)
+        key = (font.fname, font.face_index, hinting_factor, size, self.dpi,
+               glyph_index, angle, slant, extend, fx, fy, load_flags,
+               antialiased)
+        value = _cache.glyphs.get(key)
+        if value is None:
+            matrix = (0x10000 * np.array([[cos, -sin], [sin, cos]])
+                      @ [[extend, extend * slant], [0, 1]]).round().astype(int)
+            font.set_size(size, self.dpi)
+            font._set_transform(matrix, [fx, fy])
+            bitmap = font._render_glyph(
+                glyph_index, load_flags,
+                ft2font.RenderMode.NORMAL if antialiased
+                else ft2font.RenderMode.MONO)
+            buffer = np.array(bitmap.buffer)
+            if not antialiased:
+                buffer *= 0xff
+            value = (buffer, bitmap.left, bitmap.top)
+            _cache.glyphs.put(key, value)
+        buffer, left, top = value
+        self._renderer.draw_text_image(
+            buffer, left + ix, int(height) - (top + iy) + buffer.shape[0],
+            0, gc)
+    if boxes:
+        _originals['glyphs'](self, gc, x, y, angle, (), boxes)
+
+
+def _glyph_cache_supported():
+    return (backend_agg is not None
+            and hasattr(backend_agg.RendererAgg, '_draw_text_glyphs_and_boxes')
+            and hasattr(ft2font.FT2Font, '_render_glyph')
+            and hasattr(ft2font, 'RenderMode'))
+
+
+def install(persist=False, cache=None):
+    """把缓存接入 Matplotlib，返回使用的 :class:`TextCache`。
+
+    ``persist`` 为 True 时先从磁盘加载，并在进程退出时保存。字形位图缓存依赖
+    Agg 后端的内部接口，当前 Matplotlib 版本不支持时只启用其余三类缓存。
+    """
+    global _cache, _atexit_save
+    if cache is not None:
+        _cache = cache
+    cache = get_cache()
+    if not _originals:
+        _originals['metrics'] = mtext._get_text_metrics_with_cache
+        _originals['layout'] = mtext.Text._get_layout
+        parse = mmathtext.MathTextParser._parse_cached
+        _originals['mathtext'] = getattr(parse, '__wrapped__', parse)
+        mtext._get_text_metrics_with_cache = _text_metrics
+        mtext.Text._get_layout = _text_layout
+        mmathtext.MathTextParser._parse_cached = _parse_mathtext
+        if _glyph_cache_supported():
+            _originals['glyphs'] = \
+                backend_agg.RendererAgg._draw_text_glyphs_and_boxes
+            backend_agg.RendererAgg._draw_text_glyphs_and_boxes = _draw_glyphs
+        _originals['parse'] = parse
+    if persist and _atexit_save is None:
+        cache.load()
+        _atexit_save = cache.save
+        atexit.register(_atexit_save)
+    return cache
+
+
+def uninstall():
+    """恢复 Matplotlib 原来的实现；已缓存的内容保留在 :func:`get_cache` 中。"""
+    global _atexit_save
+    if _originals:
+        mtext._get_text_metrics_with_cache = _originals.pop('metrics')
+        mtext.Text._get_layout = _originals.pop('layout')
+        mmathtext.MathTextParser._parse_cached = _originals.pop('parse')
+        _originals.pop('mathtext')
+        if 'glyphs' in _originals:
+            backend_agg.RendererAgg._draw_text_glyphs_and_boxes = \
+                _originals.pop('glyphs')
+    if _atexit_save is not None:
+        atexit.unregister(_atexit_save)
+        _atexit_save = None
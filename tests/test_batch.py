@@ -0,0 +1,56 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from fantastic.batch import GridTemplate, render_batches, tile
+
+
+@pytest.fixture
+def points():
+    return {'offsets': np.random.default_rng(0).uniform(0.2, 0.8, (5, 2))}
+
+
+def test_render_is_repeatable(points):
+    template = GridTemplate(1, 2, figsize=(4, 2))
+    first = template.render([points, {}])
+    template.render([{}, points])
+    np.testing.assert_array_equal(template.render([points, {}]), first)
+    assert first.shape == template.shape + (4,)
+
+
+def test_colors_do_not_carry_over(points):
+    template = GridTemplate(1, 1, figsize=(2, 2))
+    plain = template.render([points])
+    colored = template.render([dict(points, c=np.arange(5.0))])
+    assert (plain != colored).any()
+    np.testing.assert_array_equal(template.render([points]), plain)
+
+
+def test_colormapped_template_requires_c(points):
+    template = GridTemplate(1, 1, figsize=(2, 2),
+                            scatter_kw={'cmap': 'viridis', 'vmin': 0,
+                                        'vmax': 4})
+    template.render([dict(points, c=np.arange(5.0))])
+    template.render([{}])
+    with pytest.raises(ValueError):
+        template.render([points])
+
+
+def test_tile_positions():
+    frames = [np.full((2, 3, 4), k, dtype=np.uint8) for k in range(3)]
+    sheet, rects = tile(frames, 2)
+    assert sheet.shape == (4, 6, 4)
+    assert rects[2] == {'x': 0, 'y': 2, 'w': 3, 'h': 2}
+    assert (sheet[2:, :3] == 2).all() and (sheet[2:, 3:] == 0).all()
+
+
+def test_render_batches_sheets(tmp_path, points):
+    spec = dict(nrows=1, ncols=2, figsize=(2, 1))
+    paths = render_batches(spec, [[points]] * 5, str(tmp_path), per_sheet=4,
+                           jobs=1)
+    assert [os.path.basename(p) for p in paths] == ['sheet_000000.png',
+                                                    'sheet_000004.png']
+    with open(tmp_path / 'sheet_000004.json', encoding='utf-8') as f:
+        assert [r['batch'] for r in json.load(f)] == [4]
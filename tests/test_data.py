@@ -0,0 +1,61 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fantastic import data
+
+
+@pytest.fixture
+def csv(tmp_path):
+    path = tmp_path / 'tips.csv'
+    path.write_text('total,day,smoker\n10.5,Sun,True\n3.0,Sat,False\n'
+                    '7.25,,True\n', encoding='utf-8')
+    return str(path)
+
+
+def _meta(table):
+    with open(os.path.join(table.path, 'meta.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_round_trip(csv, tmp_path):
+    table = data.load(csv, cache_dir=str(tmp_path / 'cache'))
+    assert len(table) == 3 and table.columns == ['total', 'day', 'smoker']
+    np.testing.assert_array_equal(table['total'], [10.5, 3.0, 7.25])
+    assert table.codes('day').dtype == np.int8
+    assert list(table['day']) == ['Sun', 'Sat', np.nan]
+    pd.testing.assert_frame_equal(table.to_frame(),
+                                  pd.read_csv(csv).astype({'day': 'category'}),
+                                  check_categorical=False)
+
+
+def test_touched_source_keeps_cache(csv, tmp_path):
+    cache = str(tmp_path / 'cache')
+    table = data.load(csv, cache_dir=cache)
+    converted = os.stat(os.path.join(table.path, 'c0.npy')).st_mtime_ns
+    os.utime(csv, ns=(10**18, 10**18))
+
+    table = data.load(csv, cache_dir=cache)
+    # 内容没变，不重新转换，并记下新的 mtime
+    assert os.stat(os.path.join(table.path, 'c0.npy')).st_mtime_ns == converted
+    assert _meta(table)['mtime_ns'] == 10**18
+
+
+def test_changed_source_is_reconverted(csv, tmp_path):
+    cache = str(tmp_path / 'cache')
+    data.load(csv, cache_dir=cache)
+    with open(csv, 'a', encoding='utf-8') as f:
+        f.write('1.0,Fri,False\n')
+    table = data.load(csv, cache_dir=cache)
+    assert len(table) == 4 and _meta(table)['rows'] == 4
+
+
+def test_bare_names_ignore_cwd(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'iris').write_text('not a dataset')
+    assert data.resolve('iris') == os.path.join(data.DATA_DIR, 'iris.csv')
+    with pytest.raises(FileNotFoundError):
+        data.resolve('no_such_dataset')
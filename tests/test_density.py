@@ -0,0 +1,53 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from fantastic import aggregate, density_scatter
+
+
+def test_count_matches_histogram2d():
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(0, 1, 1000), rng.uniform(0, 2, 1000)
+    grid = aggregate([(x[:300], y[:300]), (x[300:], y[300:])],
+                     (0, 1, 0, 2), (4, 5))
+    expected, _, _ = np.histogram2d(y, x, bins=(4, 5), range=((0, 2), (0, 1)))
+    np.testing.assert_array_equal(grid.filled(0), expected)
+
+
+def test_empty_cells_are_masked():
+    grid = aggregate([([0.1], [0.1])], (0, 1, 0, 1), (2, 2))
+    np.testing.assert_array_equal(grid.mask, [[False, True], [True, True]])
+
+
+def test_upper_edges_fall_in_last_cell():
+    grid = aggregate([([1.0, 2.0], [1.0, 0.0])], (0, 1, 0, 1), (2, 2))
+    assert grid[1, 1] == 1 and grid.count() == 1
+
+
+@pytest.mark.parametrize('how, expected', [('sum', 4.0), ('mean', 2.0),
+                                           ('max', 3.0)])
+def test_value_reductions(how, expected):
+    chunks = [([0.1, 0.2, 0.9], [0.1, 0.2, 0.9], [1.0, 3.0, np.nan])]
+    grid = aggregate(chunks, (0, 1, 0, 1), (2, 2), how=how)
+    assert grid[0, 0] == expected
+    assert grid.mask[1, 1]
+
+
+def test_value_reduction_requires_c():
+    with pytest.raises(ValueError):
+        aggregate([([0.1], [0.1])], (0, 1, 0, 1), (1, 1), how='mean')
+
+
+def test_zero_width_extent():
+    grid = aggregate([([2.0, 2.0, 3.0], [0.1, 0.6, 0.1])], (2, 2, 0, 1),
+                     (2, 3))
+    np.testing.assert_array_equal(grid.filled(0)[:, 0], [1, 1])
+    assert grid.count() == 2
+
+
+def test_rejects_log_axes():
+    fig, ax = plt.subplots()
+    ax.set_xscale('log')
+    with pytest.raises(ValueError):
+        density_scatter(ax, [1, 2], [1, 2])
+    plt.close(fig)
@@ -0,0 +1,52 @@
+import os
+import shutil
+
+from matplotlib import font_manager
+
+from fantastic.fonts import FontIndex, coverage_blocks
+
+
+def _copy_font(directory, family, name):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    shutil.copyfile(font_manager.findfont(family, fallback_to_default=False),
+                    path)
+    return path
+
+
+def test_coverage_blocks():
+    assert coverage_blocks([0x41, 0x42, 0x4e2d]) == {0: 0b11 << 0x41,
+                                                     0x4e: 1 << 0x2d}
+
+
+def test_first_refresh_returns_scan_count(tmp_path):
+    fonts = str(tmp_path / 'fonts')
+    _copy_font(fonts, 'DejaVu Sans', 'a.ttf')
+    _copy_font(os.path.join(fonts, 'sub'), 'DejaVu Serif', 'b.ttf')
+    index = FontIndex(str(tmp_path / 'index.pickle'), [fonts])
+    assert index.refresh() == 2
+    assert sorted(r.family for r in index.fonts) == ['DejaVu Sans',
+                                                     'DejaVu Serif']
+    # 第二个进程从磁盘加载，目录没有变化
+    assert FontIndex(index.path, [fonts]).refresh(full=True) == 0
+
+
+def test_best_font_prefers_family_order(tmp_path):
+    fonts = str(tmp_path / 'fonts')
+    _copy_font(fonts, 'DejaVu Sans', 'a.ttf')
+    _copy_font(fonts, 'DejaVu Serif', 'b.ttf')
+    index = FontIndex(str(tmp_path / 'index.pickle'), [fonts])
+    assert index.best_font('abc', ['DejaVu Serif']).family == 'DejaVu Serif'
+    assert index.best_font('abc', ['DejaVu Sans']).family == 'DejaVu Sans'
+    assert index.best_font('\U0001F600中', ['DejaVu Sans']) is None
+
+
+def test_new_font_found_after_first_query(tmp_path):
+    fonts = str(tmp_path / 'fonts')
+    _copy_font(fonts, 'DejaVu Sans', 'a.ttf')
+    index = FontIndex(str(tmp_path / 'index.pickle'), [fonts])
+    assert index.best_font('abc', ['DejaVu Serif']).family == 'DejaVu Sans'
+
+    _copy_font(fonts, 'DejaVu Serif', 'b.ttf')
+    os.utime(fonts, ns=(1, 1))
+    assert index.best_font('xyz', ['DejaVu Serif']).family == 'DejaVu Serif'
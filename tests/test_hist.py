@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from fantastic import hist_collection, histogram
+
+
+def test_single_array_matches_numpy():
+    x = np.random.default_rng(0).normal(size=1000)
+    counts, edges = histogram(x, bins=20)
+    expected, expected_edges = np.histogram(x, bins=20)
+    np.testing.assert_array_equal(counts, expected)
+    np.testing.assert_allclose(edges, expected_edges)
+
+
+@pytest.mark.parametrize('wrap', [list, tuple, iter])
+def test_chunks_match_concatenated(wrap):
+    rng = np.random.default_rng(1)
+    # 各块长度不同
+    chunks = [rng.uniform(0, 10, n) for n in (5, 100, 37)]
+    counts, edges = histogram(wrap(chunks), bins=10, range=(0, 10))
+    expected, _ = np.histogram(np.concatenate(chunks), bins=10, range=(0, 10))
+    np.testing.assert_array_equal(counts, expected)
+
+
+def test_list_of_scalars_is_one_array():
+    counts, _ = histogram([0.5, 1.5, 1.6], bins=2, range=(0, 2))
+    np.testing.assert_array_equal(counts, [1, 2])
+
+
+def test_chunked_input_requires_range():
+    with pytest.raises(ValueError):
+        histogram([np.arange(3), np.arange(4)], bins=3)
+
+
+def test_chunked_weights():
+    a, b = np.array([0.5, 1.5]), np.array([1.0, 1.2, 0.1])
+    counts, _ = histogram([a, b], 2, (0, 2),
+                          weights=[np.ones(2), np.full(3, 2.0)])
+    np.testing.assert_array_equal(counts, [3, 5])
+
+
+@pytest.mark.parametrize('n_weights', [1, 3])
+def test_weight_chunk_count_mismatch(n_weights):
+    a, b = np.array([0.5, 1.5]), np.array([1.0])
+    with pytest.raises(ValueError):
+        histogram([a, b], 3, (0, 2), weights=[np.ones(2)] * n_weights)
+
+
+def test_hist_collection_vertices():
+    coll = hist_collection([1, 3], [0, 1, 2])
+    verts = coll.get_paths()[1].vertices[:4]
+    np.testing.assert_array_equal(verts, [[1, 0], [1, 3], [2, 3], [2, 0]])
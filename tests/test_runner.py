@@ -0,0 +1,88 @@
+import os
+
+from fantastic import runner
+from fantastic.runner import Cell, CellCache
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+def test_dependencies_stay_inside_root(tmp_path):
+    root = str(tmp_path / 'repo')
+    dep = _write(os.path.join(root, 'data', 'a.csv'), 'x\n1\n')
+    _write(str(tmp_path / 'repo2' / 'b.csv'), 'x\n')
+    source = "pd.read_csv('data/a.csv'); open('../repo2/b.csv')"
+    assert runner.dependencies(source, root) == [dep]
+
+
+def test_cell_keys_follow_dependencies(tmp_path):
+    root = str(tmp_path)
+    dep = _write(os.path.join(root, 'data', 'a.csv'), 'x\n1\n')
+    cells = [Cell(0, 'import pandas as pd'),
+             Cell(1, "df = pd.read_csv('data/a.csv')"),
+             Cell(2, 'df.plot()')]
+    before = runner.cell_keys(cells, 'base', root)
+    assert runner.cell_keys(cells, 'base', root) == before
+
+    _write(dep, 'x\n2\n')
+    os.utime(dep, ns=(1, 1))
+    after = runner.cell_keys(cells, 'base', root)
+    # 依赖文件变化后，引用它的单元格及其后续单元格失效
+    assert after[0] == before[0]
+    assert after[1] != before[1] and after[2] != before[2]
+
+
+def test_cell_keys_chain_on_source(tmp_path):
+    cells = [Cell(0, 'a = 1'), Cell(1, 'b = a')]
+    keys = runner.cell_keys(cells, 'base', str(tmp_path))
+    changed = runner.cell_keys([Cell(0, 'a = 2'), cells[1]], 'base',
+                               str(tmp_path))
+    assert keys[0] != changed[0] and keys[1] != changed[1]
+    assert runner.cell_keys(cells, 'other', str(tmp_path))[0] != keys[0]
+
+
+def test_base_fingerprint_keeps_backend():
+    import matplotlib
+    backend = matplotlib.get_backend()
+    runner.base_fingerprint()
+    assert matplotlib.get_backend() == backend
+
+
+def test_store_merges_formats(tmp_path):
+    cache = CellCache(str(tmp_path / 'cache'))
+    png = _write(str(tmp_path / 'out' / 'a.png'), 'png')
+    svg = _write(str(tmp_path / 'out' / 'a.svg'), 'svg')
+    cache.store('ab' * 32, [{'png': png}], 'hello')
+    assert cache.lookup('ab' * 32, ['png'])['stdout'] == 'hello'
+    assert cache.lookup('ab' * 32, ['png', 'svg']) is None
+
+    # 已有条目是非空目录，再次写入时合并两种格式
+    cache.store('ab' * 32, [{'svg': svg}], 'hello')
+    assert cache.lookup('ab' * 32, ['png', 'svg']) is not None
+
+
+def test_restore_clears_stale_outputs(tmp_path):
+    cache = CellCache(str(tmp_path / 'cache'))
+    outdir = str(tmp_path / 'chapter')
+    png = _write(str(tmp_path / 'src' / 'a.png'), 'png')
+    cache.store('cd' * 32, [{'png': png}], '')
+    for k in range(3):
+        _write(os.path.join(outdir, f'index_4_{k}.png'), 'old')
+    _write(os.path.join(outdir, 'index_41_0.png'), 'other cell')
+
+    meta = cache.lookup('cd' * 32, ['png'])
+    written = cache.restore('cd' * 32, meta, ['png'], outdir, 4)
+    assert sorted(os.listdir(outdir)) == ['index_41_0.png', 'index_4_0.png']
+    assert written == [os.path.join(outdir, 'index_4_0.png')]
+
+
+def test_load_cells_from_script(tmp_path):
+    path = _write(str(tmp_path / 'index.py'),
+                  '#!/usr/bin/env python\n# In[1]:\n\n%matplotlib inline\n'
+                  'import numpy\n\n# In[ ]:\n\nx = 1\n')
+    cells = runner.load_cells(path)
+    assert cells == [Cell(0, 'import numpy'), Cell(1, 'x = 1')]
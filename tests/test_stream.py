@@ -0,0 +1,92 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from fantastic.stream import LivePlot, RingBuffer, minmax_decimate
+
+
+def test_ring_buffer_wraps():
+    buf = RingBuffer(4)
+    buf.extend([1, 2, 3])
+    buf.extend([4, 5])
+    np.testing.assert_array_equal(buf.view(), [2, 3, 4, 5])
+    buf.extend(np.arange(10))
+    np.testing.assert_array_equal(buf.view(), [6, 7, 8, 9])
+    assert len(buf) == 4 and not buf.view().flags.writeable
+
+
+def test_ring_buffer_view_is_a_view():
+    buf = RingBuffer(3)
+    buf.extend([1, 2, 3, 4])
+    assert np.shares_memory(buf.view(), buf._data)
+
+
+def test_decimate_keeps_short_input():
+    x = np.arange(10.0)
+    out_x, out_y = minmax_decimate(x, x * 2, 2, 5, columns=4)
+    np.testing.assert_array_equal(out_x, np.arange(1.0, 7.0))
+    np.testing.assert_array_equal(out_y, out_x * 2)
+
+
+def test_decimate_keeps_extrema_in_order():
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 1, 10001)
+    y = rng.standard_normal(len(x))
+    columns = 50
+    out_x, out_y = minmax_decimate(x, y, 0, 1, columns)
+    assert len(out_x) <= 4 * columns + 2
+    assert np.all(np.diff(out_x) >= 0)
+    # 抽稀后的点都是原始样本
+    idx = np.searchsorted(x, out_x)
+    np.testing.assert_array_equal(y[idx], out_y)
+    # 每列的首尾点和极值都被保留
+    col = np.minimum((x * columns).astype(int), columns - 1)
+    out_col = col[idx]
+    for k in (0, 17, columns - 1):
+        sel = col == k
+        kept = out_y[out_col == k]
+        assert kept.min() == y[sel].min() and kept.max() == y[sel].max()
+        assert kept[0] == y[sel][0] and kept[-1] == y[sel][-1]
+
+
+def test_decimate_all_nan_column():
+    x = np.linspace(0, 1, 1000)
+    y = np.where(x < 0.5, np.nan, x)
+    out_x, out_y = minmax_decimate(x, y, 0, 1, 10)
+    assert np.isnan(out_y[0]) and out_y[-1] == 1.0
+
+
+@pytest.fixture
+def figure():
+    fig, axs = plt.subplots(2)
+    for ax in axs:
+        ax.set_xlim(0, 10)
+        ax.set_ylim(0, 1)
+    yield fig, axs
+    plt.close(fig)
+
+
+def test_blits_without_full_redraw(figure):
+    fig, (ax, _) = figure
+    live = LivePlot(fig)
+    series = live.line(ax)
+    series.append(1, 0.5)
+    assert live.update()
+    series.append([2, 3], [0.4, 0.6])
+    assert not live.update()
+    series.append(20, 0.5)
+    assert live.update() and ax.get_xlim()[1] >= 20
+
+
+def test_series_added_after_draw(figure):
+    fig, (ax1, ax2) = figure
+    live = LivePlot(fig)
+    first = live.line(ax1)
+    first.append(1, 0.5)
+    live.update()
+    # 新序列所在的坐标轴还没有缓存背景，需要完整重绘一次
+    second = live.line(ax2)
+    second.append(1, 0.5)
+    assert live.update()
+    second.append(2, 0.5)
+    assert not live.update()
@@ -0,0 +1,54 @@
+import os
+import pickle
+
+import matplotlib as mpl
+import pytest
+
+from fantastic.styles import StyleRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return StyleRegistry(str(tmp_path), offline=True)
+
+
+def _pickles(registry):
+    return [os.path.join(registry.cache_dir, f)
+            for f in os.listdir(registry.cache_dir) if f.endswith('.pickle')]
+
+
+def test_stacked_styles_override_left_to_right(registry):
+    flat = registry.resolve(['dark_background', {'axes.facecolor': 'red'}])
+    assert flat['axes.facecolor'] == 'red'
+    assert flat['figure.facecolor'] == 'black'
+
+
+def test_local_url_maps_to_repo_file(registry):
+    url = ('https://raw.githubusercontent.com/datawhalechina/'
+           'fantastic-matplotlib/main/file/presentation.mplstyle')
+    assert registry.resolve(url) == registry.resolve('presentation')
+
+
+def test_offline_url_without_cache(registry):
+    with pytest.raises(OSError):
+        registry.resolve('https://example.com/a/b/main/missing.mplstyle')
+
+
+def test_unreadable_pickle_is_rebuilt(registry):
+    flat = registry.resolve(['ggplot'])
+    path, = _pickles(registry)
+    # 模拟其他版本写入、引用了不存在的模块的缓存
+    with open(path, 'wb') as f:
+        f.write(b'cmissing_module\nThing\n.')
+    with pytest.raises(ImportError), open(path, 'rb') as f:
+        pickle.load(f)
+    assert StyleRegistry(os.path.dirname(registry.cache_dir),
+                         offline=True).resolve(['ggplot']) == flat
+
+
+def test_cache_key_includes_matplotlib_version(registry, monkeypatch):
+    registry.resolve(['ggplot'])
+    monkeypatch.setattr(mpl, '__version__', '0.0.0')
+    StyleRegistry(os.path.dirname(registry.cache_dir),
+                  offline=True).resolve(['ggplot'])
+    assert len(_pickles(registry)) == 2
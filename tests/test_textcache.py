@@ -0,0 +1,102 @@
+import io
+import shutil
+
+import matplotlib.pyplot as plt
+import pytest
+from matplotlib import font_manager
+from matplotlib.backends.backend_mixed import MixedModeRenderer
+from matplotlib.backends.backend_svg import RendererSVG
+
+from fantastic import textcache
+from fantastic.textcache import LRUCache, TextCache
+
+
+@pytest.fixture
+def cache():
+    cache = textcache.install(cache=TextCache())
+    yield cache
+    textcache.uninstall()
+
+
+def _figure_bytes(fmt):
+    fig, ax = plt.subplots()
+    ax.set_title('Damped oscillations', rotation=5)
+    ax.text(0.2, 0.5, r'$\sum_{i=0}^\infty x_i$', rotation=15)
+    ax.set_xlabel('time (s)')
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt)
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def test_lru_eviction_by_size():
+    lru = LRUCache(10, sizeof=len)
+    lru.put('a', 'xxxx')
+    lru.put('b', 'xxxx')
+    assert lru.get('a') == 'xxxx'
+    lru.put('c', 'xxxx')
+    assert 'b' not in lru and 'a' in lru and lru.size == 8
+    assert lru.get('b') is None and lru.info()['hits'] == 1
+
+
+def test_mixed_mode_renderers_are_distinguished():
+    fig = plt.figure()
+    svg = MixedModeRenderer(fig, 1, 1, 72, RendererSVG(1, 1, io.StringIO()))
+    plt.close(fig)
+    assert textcache._renderer_key(svg) == ('RendererSVG', 72)
+
+
+def test_fonts_key_changes_after_addfont(tmp_path):
+    before = textcache.fonts_key()
+    path = str(tmp_path / 'extra.ttf')
+    shutil.copyfile(font_manager.findfont('DejaVu Serif'), path)
+    font_manager.fontManager.addfont(path)
+    try:
+        assert textcache.fonts_key() != before
+        assert textcache.rc_key()[-1] == textcache.fonts_key()
+    finally:
+        font_manager.fontManager.ttflist.pop()
+
+
+@pytest.mark.parametrize('order', [('svg', 'pdf', 'ps', 'png'),
+                                   ('png', 'ps', 'pdf', 'svg')])
+def test_cached_output_matches(order, monkeypatch):
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '0')
+    monkeypatch.setitem(plt.rcParams, 'svg.hashsalt', 'textcache')
+    # 核心字体和 AFM 的度量与 FreeType 不同，各格式共用缓存时输出会变
+    monkeypatch.setitem(plt.rcParams, 'pdf.use14corefonts', True)
+    monkeypatch.setitem(plt.rcParams, 'ps.useafm', True)
+    expected = {fmt: _figure_bytes(fmt) for fmt in order}
+    cache = textcache.install(cache=TextCache())
+    try:
+        for _ in range(2):
+            for fmt in order:
+                assert _figure_bytes(fmt) == expected[fmt], fmt
+        assert cache.layouts.hits
+    finally:
+        textcache.uninstall()
+
+
+def test_save_and_load(tmp_path, cache):
+    _figure_bytes('png')
+    path = str(tmp_path / 'cache.pickle')
+    saved = cache.save(path)
+    other = TextCache()
+    assert other.load(path) == saved > 0
+    assert other.load(str(tmp_path / 'missing.pickle')) == 0
+
+
+def test_load_rejects_other_fonts(tmp_path, cache, monkeypatch):
+    _figure_bytes('png')
+    path = str(tmp_path / 'cache.pickle')
+    cache.save(path)
+    monkeypatch.setattr(textcache, 'fonts_key', lambda: 'changed')
+    assert TextCache().load(path) == 0
+
+
+def test_uninstall_restores_originals(cache):
+    from matplotlib import text as mtext
+    assert mtext.Text._get_layout is textcache._text_layout
+    textcache.uninstall()
+    assert mtext.Text._get_layout is not textcache._text_layout